@@ -0,0 +1,322 @@
+"""
+轨迹生成流水线的离线基准测试。
+
+对 generate_running_data_payload、interpolate_points、split_track_into_segments 与载荷 JSON 编码
+在不同距离、采样间隔与上传条数下计时并统计内存峰值（tracemalloc），随机种子固定以保证可复现。
+
+用法（在项目根目录下）:
+    python benchmarks/bench_pipeline.py                    # 运行并与 benchmarks/baseline.json 比较
+    python benchmarks/bench_pipeline.py --save-baseline    # 运行并保存为新的基线
+    python benchmarks/bench_pipeline.py --quick --engine python --output bench_output.txt
+    python benchmarks/bench_pipeline.py --compare-timing   # 同时比较耗时
+
+默认只比较内存峰值（tracemalloc，结果在同一 Python/NumPy 版本下可复现），超过基线 (1 + threshold) 倍的
+用例被标记为回归，此时进程以退出码 1 结束。耗时受机器负载影响，波动常超过 25%，因此只在 --compare-timing 时比较：
+允许的增幅为 timing-threshold 加上本次与基线各自的计时噪声（中位数相对最小值的偏差）中较大者。
+更换 Python/NumPy 版本后应重新保存基线。
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from itertools import product
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src import data_generator
+from src.config import RunSettings, DEFAULT_CONFIG
+from src.payload_encoder import encode_payload
+from utils.auxiliary_util import np
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+DISTANCES_M = (1000, 5000, 10000, 21000)
+INTERVALS_SEC = (1, 3, 5)
+RUN_COUNTS = (1, 10)
+QUICK_DISTANCES_M = (1000, 5000)
+QUICK_INTERVALS_SEC = (3,)
+QUICK_RUN_COUNTS = (1,)
+
+PACE_MIN_PER_KM = 4.5
+
+# 每次计时的最短时长（秒）；单次调用更快的用例会循环多次后取平均，降低计时噪声
+MIN_SAMPLE_SEC = 0.02
+
+RUNTIME_CONFIG = {
+    "USER_ID": "benchmark",
+    "INTERVAL_SECONDS": 3,
+    "START_TIME_EPOCH_MS": 1735689600000,
+}
+
+
+def _settings(distance_m, interval_sec):
+    raw = dict(DEFAULT_CONFIG, **{
+        "参数随机": False,
+        "每日距离_米": distance_m,
+        "配速_分钟每公里": PACE_MIN_PER_KM,
+        "GPS采样间隔_秒": interval_sec,
+    })
+    return RunSettings.from_mapping(raw)
+
+
+def _generate(settings, runs):
+    config = dict(RUNTIME_CONFIG)
+    return [
+        data_generator.generate_running_data_payload(config, [], {}, settings=settings)[0]
+        for _ in range(runs)
+    ]
+
+
+def _build_cases(distances, intervals, run_counts):
+    """返回 [(用例名, 准备函数, 被测函数)]；准备函数在计时外执行，其返回值传给被测函数。"""
+    cases = []
+    for distance_m, interval_sec in product(distances, intervals):
+        settings = _settings(distance_m, interval_sec)
+
+        def prepare_interpolate(settings=settings, distance_m=distance_m):
+            end_lon = settings.start_longitude + distance_m / settings.meters_per_degree_lon
+            return settings, end_lon
+
+        def run_interpolate(prepared):
+            settings, end_lon = prepared
+            return data_generator.interpolate_points(
+                settings.start_latitude, settings.start_longitude, settings.start_latitude, end_lon,
+                settings.speed_mps, settings.interval_seconds)
+
+        cases.append((f"interpolate/d={distance_m}/i={interval_sec}", prepare_interpolate, run_interpolate))
+
+        def prepare_split(settings=settings):
+            payload = _generate(settings, 1)[0]
+            track = payload[0]["tracks"][0]["points"].track
+            return track, settings.total_duration_sec
+
+        def run_split(prepared):
+            track, total_duration_sec = prepared
+            # 清除累计距离缓存，使每次计时都包含索引构建
+            track._cumulative_distances = None
+            return data_generator.split_track_into_segments(track, total_duration_sec)
+
+        cases.append((f"split/d={distance_m}/i={interval_sec}", prepare_split, run_split))
+
+        for runs in run_counts:
+            cases.append((
+                f"generate/d={distance_m}/i={interval_sec}/runs={runs}",
+                lambda: None,
+                lambda prepared, settings=settings, runs=runs: _generate(settings, runs),
+            ))
+            cases.append((
+                f"encode/d={distance_m}/i={interval_sec}/runs={runs}",
+                lambda settings=settings, runs=runs: _generate(settings, runs),
+                lambda payloads: [encode_payload(payload) for payload in payloads],
+            ))
+    return cases
+
+
+def _calibrate(func, prepared):
+    """与 timeit.autorange 相同：按 1、2、5、10... 增大循环次数，直到单次计时不短于 MIN_SAMPLE_SEC。"""
+    number = 1
+    while True:
+        for multiplier in (1, 2, 5):
+            loops = number * multiplier
+            started = time.perf_counter()
+            for _ in range(loops):
+                func(prepared)
+            if time.perf_counter() - started >= MIN_SAMPLE_SEC:
+                return loops
+        number *= 10
+
+
+def _measure(prepare, func, repeat, seed):
+    random.seed(seed)
+    loops = _calibrate(func, prepare())
+
+    times = []
+    for _ in range(repeat):
+        random.seed(seed)
+        prepared = prepare()
+        started = time.perf_counter()
+        for _ in range(loops):
+            func(prepared)
+        times.append((time.perf_counter() - started) / loops)
+
+    random.seed(seed)
+    prepared = prepare()
+    tracemalloc.start()
+    try:
+        func(prepared)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "loops": loops,
+        "min_ms": min(times) * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def _reference_workload(prepared):
+    """与项目代码无关的固定纯 Python 计算，用于衡量当前机器的速度。"""
+    total = 0.0
+    for i in range(20000):
+        total += math.sin(i) * math.sqrt(i)
+    return total
+
+
+def measure_reference(repeat):
+    """测量参考负载耗时（毫秒），比较基线时据此抵消机器整体快慢的差异。"""
+    return _measure(lambda: None, _reference_workload, repeat, 0)["min_ms"]
+
+
+def run_benchmarks(quick=False, repeat=5, seed=20250101, log=print):
+    if quick:
+        cases = _build_cases(QUICK_DISTANCES_M, QUICK_INTERVALS_SEC, QUICK_RUN_COUNTS)
+    else:
+        cases = _build_cases(DISTANCES_M, INTERVALS_SEC, RUN_COUNTS)
+
+    results = {}
+    for name, prepare, func in cases:
+        results[name] = _measure(prepare, func, repeat, seed)
+        result = results[name]
+        log(f"{name:<36} min {result['min_ms']:9.3f} ms   median {result['median_ms']:9.3f} ms   peak {result['peak_kib']:9.1f} KiB")
+    return results
+
+
+def _timing_noise(result):
+    """计时噪声：中位数相对最小值的偏差比例。"""
+    return result["median_ms"] / result["min_ms"] - 1 if result["min_ms"] > 0 else 0.0
+
+
+def compare_with_baseline(results, baseline, threshold, speed_ratio=1.0, timing_threshold=None):
+    """
+    返回回归列表 [(用例名, 指标, 基线值, 当前值)]；基线中不存在的用例不参与比较。
+    内存峰值按 threshold 比较；timing_threshold 不为 None 时才比较耗时，
+    允许的增幅为 timing_threshold 加上本次与基线计时噪声中的较大者。
+    speed_ratio 为本次与基线的参考负载耗时之比，基线耗时按此比例换算后再比较。
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if expected["peak_kib"] > 0 and result["peak_kib"] > expected["peak_kib"] * (1 + threshold):
+            regressions.append((name, "peak_kib", expected["peak_kib"], result["peak_kib"]))
+        if timing_threshold is not None:
+            expected_ms = expected["min_ms"] * speed_ratio
+            allowed = timing_threshold + max(_timing_noise(result), _timing_noise(expected))
+            if expected_ms > 0 and result["min_ms"] > expected_ms * (1 + allowed):
+                regressions.append((name, "min_ms", expected_ms, result["min_ms"]))
+    return regressions
+
+
+def _environment(engine):
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__ if np is not None else None,
+        "engine": engine,
+        "platform": platform.platform(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="轨迹生成流水线基准测试")
+    parser.add_argument("--quick", action="store_true", help="只运行少量用例")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的计时次数（取最小值与中位数）")
+    parser.add_argument("--seed", type=int, default=20250101, help="随机种子")
+    parser.add_argument("--engine", choices=("auto", "python", "numpy"), default="auto", help="轨迹生成引擎")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=0.25, help="内存峰值判定为回归的相对增幅")
+    parser.add_argument("--compare-timing", action="store_true", help="同时比较耗时（受机器负载影响较大）")
+    parser.add_argument("--timing-threshold", type=float, default=0.5, help="耗时判定为回归的相对增幅（另加计时噪声）")
+    parser.add_argument("--output", help="同时将报告写入该文件")
+    args = parser.parse_args(argv)
+
+    if args.engine == "numpy" and np is None:
+        parser.error("NumPy 未安装，无法使用 numpy 引擎")
+    if args.engine != "auto":
+        data_generator.USE_NUMPY_ENGINE = args.engine == "numpy"
+    engine = "numpy" if data_generator.USE_NUMPY_ENGINE else "python"
+
+    lines = []
+
+    def log(line):
+        print(line)
+        lines.append(line)
+
+    environment = _environment(engine)
+    log(f"引擎: {engine}   Python {environment['python']}   NumPy {environment['numpy']}   重复 {args.repeat} 次   种子 {args.seed}")
+    reference_ms = measure_reference(args.repeat)
+    results = run_benchmarks(quick=args.quick, repeat=args.repeat, seed=args.seed, log=log)
+    # 再测一次参考负载，取两次中较快者，以减少运行期间机器负载波动的影响
+    reference_ms = min(reference_ms, measure_reference(args.repeat))
+    log(f"参考负载: {reference_ms:.3f} ms")
+
+    exit_code = 0
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment, "reference_ms": reference_ms, "results": results}, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        log(f"基线已保存: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        mismatched = _environment_mismatch(baseline.get("environment", {}), environment)
+        if mismatched:
+            # 内存峰值随引擎与 Python/NumPy 版本变化，环境不同时比较没有意义
+            details = "，".join(f"{key} {old} -> {new}" for key, old, new in mismatched)
+            log(f"基线的运行环境与本次不同（{details}），跳过比较；请在本环境下使用 --save-baseline 重新保存。")
+        else:
+            exit_code = _report_regressions(results, baseline, reference_ms, args, log)
+    else:
+        log(f"未找到基线文件 {args.baseline}，使用 --save-baseline 生成。")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    return exit_code
+
+
+def _environment_mismatch(baseline_env, environment):
+    """返回影响内存峰值的环境差异 [(项, 基线值, 本次值)]：引擎、NumPy 版本与 Python 主次版本。"""
+    def python_minor(version):
+        return ".".join(str(version).split(".")[:2])
+
+    mismatched = []
+    for key, normalize in (("engine", str), ("numpy", str), ("python", python_minor)):
+        old, new = baseline_env.get(key), environment.get(key)
+        if normalize(old) != normalize(new):
+            mismatched.append((key, old, new))
+    return mismatched
+
+
+def _report_regressions(results, baseline, reference_ms, args, log):
+    """与基线比较并输出结果，有回归时返回 1。"""
+    timing_threshold = args.timing_threshold if args.compare_timing else None
+    speed_ratio = reference_ms / baseline["reference_ms"] if baseline.get("reference_ms") else 1.0
+    if timing_threshold is not None:
+        log(f"本机速度相对基线: 参考负载耗时为基线的 {speed_ratio:.2f} 倍，基线耗时按此换算")
+    else:
+        log("只比较内存峰值；使用 --compare-timing 同时比较耗时")
+
+    regressions = compare_with_baseline(results, baseline.get("results", {}), args.threshold, speed_ratio, timing_threshold)
+    if not regressions:
+        log("与基线相比无回归。")
+        return 0
+    log(f"发现 {len(regressions)} 项回归:")
+    for name, metric, expected, actual in regressions:
+        log(f"  {name} {metric}: {expected:.3f} -> {actual:.3f} ({actual / expected - 1:+.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,7 +22,6 @@ a = Analysis(
         'src.login',
         'src.config',
         'utils.auxiliary_util',
-        'assets.resources_rc',
     ],
     hookspath=[],
     hooksconfig={},
@@ -1,6 +1,14 @@
 import sys
 import os
-import re
+import tempfile
+from utils.startup import LazyModule, StartupProfiler
+
+# --profile-startup：统计各模块导入与窗口初始化耗时，首帧绘制后输出报告
+PROFILER = StartupProfiler(enabled="--profile-startup" in sys.argv)
+PROFILER.install_import_hook()
+# --trace-metrics：记录登录与上传各阶段的耗时、发送字节数与重试次数，写入临时目录下的 JSONL 文件
+TRACE_METRICS = "--trace-metrics" in sys.argv
+
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QPushButton, QTextEdit, QProgressBar, QFormLayout, QGroupBox, QDateTimeEdit,
@@ -10,63 +18,134 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import QThread, Signal, QDateTime, Qt, QUrl, QEvent, QTimer
 from PySide6.QtGui import QTextCursor, QFont, QColor, QTextCharFormat, QPalette, QBrush, QIcon, QDesktopServices
 
-from src.main import run_sports_upload
-import src.login as login
-from src.config import load_config
+from src.config import load_config_cached, ConfigWriter, RunSettings, DEFAULT_CONFIG
+from src.channels import LogBuffer, ProgressChannel, is_progress_message, PHASE_LOGIN
 from utils.auxiliary_util import SportsUploaderError, get_base_path
+from utils.cancellation import CancellationToken
+from utils.metrics import NULL_METRICS, MetricsRecorder, JsonlTraceSink
 import src.config as config
 
-
-from src.info_dialog import HelpWidget
+# 网络（requests/tenacity）与关于窗口相关模块在首次使用时才导入，缩短冷启动时间
+uploader = LazyModule("src.main", PROFILER)
+login = LazyModule("src.login", PROFILER)
+info_dialog = LazyModule("src.info_dialog", PROFILER)
 
 RESOURCES_SUB_DIR = "assets"
 
+# 日志与进度的界面刷新间隔（毫秒）及日志最多保留的行数
+UI_REFRESH_INTERVAL_MS = 50
+LOG_MAX_BLOCKS = 5000
+
 RESOURCES_FULL_PATH = os.path.join(get_base_path(), RESOURCES_SUB_DIR)
+METRICS_TRACE_PATH = os.path.join(tempfile.gettempdir(), "SJTURunning-metrics.jsonl")
 
 class WorkerThread(QThread):
     """
     工作线程，用于在后台执行跑步数据上传任务，避免UI冻结。
+    先登录 Jaccount，再执行上传；两个阶段都可被停止按钮中断。
+    日志写入共享的 LogBuffer、进度写入 ProgressChannel，均由界面定时取样刷新，不逐条发送信号。
     """
-    progress_update = Signal(int, int, str)
-    log_output = Signal(str, str)
+    login_failed = Signal(str)
     finished = Signal(bool, str)
 
-    def __init__(self, config_data):
+    def __init__(self, config_data, log_buffer, progress_channel, settings=None):
         super().__init__()
         self.config_data = config_data
+        # 界面线程上已校验好的 RunSettings，工作线程不再从磁盘读取配置
+        self.settings = settings
+        self.log_buffer = log_buffer
+        self.progress_channel = progress_channel
+        # 停止按钮通过该标记中断登录、网络请求与重试等待
+        self.cancel_token = CancellationToken()
+        self.metrics = NULL_METRICS
+        self._trace_sink = None
 
     def run(self):
+        self._trace_sink = None
+        if TRACE_METRICS:
+            self._trace_sink = JsonlTraceSink(METRICS_TRACE_PATH)
+            self.metrics = MetricsRecorder(self._trace_sink)
+        try:
+            self._run_job()
+        finally:
+            # 正常路径已在 _finish 中关闭；此处仅兜底未预期的异常
+            if self._trace_sink is not None:
+                self._trace_sink.close()
+
+    def _finish(self, success, message):
+        """结束任务：先写出指标汇总并关闭记录文件，再发出 finished，确保界面收尾时能取到这些日志。"""
+        trace_sink, self._trace_sink = self._trace_sink, None
+        if trace_sink is not None:
+            self.log_buffer.append(self.metrics.format_summary(), "info")
+            self.log_buffer.append(f"指标记录已写入: {trace_sink.path}", "info")
+            trace_sink.close()
+        self.finished.emit(success, message)
+
+    def _run_job(self):
+        login_error = self._login()
+        if login_error is not None:
+            if self.isInterruptionRequested():
+                self._finish(False, "任务已手动终止。")
+            else:
+                self.login_failed.emit(login_error)
+                self._finish(False, f"登录失败: {login_error}")
+            return
+
         success = False
         message = "任务已完成。"
         try:
-            success, message = run_sports_upload(
+            success, message = uploader.run_sports_upload(
                 self.config_data,
-                progress_callback=self.progress_callback,
+                progress_callback=self.progress_channel,
                 log_cb=self.log_callback,
-                stop_check_cb=self.isInterruptionRequested
+                stop_check_cb=self.cancel_token,
+                settings=self.settings,
+                metrics=self.metrics
             )
         except SportsUploaderError as e:
-            self.log_output.emit(f"任务中断: {e}", "error")
+            self.log_buffer.append(f"任务中断: {e}", "error")
             message = str(e)
             success = False
         except Exception as e:
-            self.log_output.emit(f"发生未预期的错误: {e}", "error")
+            self.log_buffer.append(f"发生未预期的错误: {e}", "error")
             message = f"未预期的错误: {e}"
             success = False
         finally:
             if self.isInterruptionRequested() and not success:
-                 self.finished.emit(False, "任务已手动终止。")
+                 self._finish(False, "任务已手动终止。")
             else:
-                 self.finished.emit(success, message)
+                 self._finish(success, message)
 
-    def progress_callback(self, current, total, message):
-        self.progress_update.emit(current, total, message)
+    def cancel(self):
+        """请求停止任务：阻塞中的请求和等待会立即中断。"""
+        self.requestInterruption()
+        self.cancel_token.cancel()
+
+    def _login(self):
+        """登录阶段：使用界面中的用户名/密码获取 session，成功返回 None，失败返回错误信息。"""
+        self.progress_channel(0, 1, "正在登录 Jaccount...", PHASE_LOGIN)
+        try:
+            username = self.config_data.get("USER_ID")
+            password = self.config_data.get("PASSWORD")
+            with self.metrics.timer("login"):
+                session = login.login(username, password, log_cb=self.log_callback,
+                                      stop_check_cb=self.cancel_token, metrics=self.metrics)
+        except Exception as e:
+            return str(e)
+        self.config_data["SESSION"] = session
+        # USER_ID 即 Jaccount 用户名
+        self.config_data["USER_ID"] = username
+        self.progress_channel(1, 1, "登录成功", PHASE_LOGIN)
+        return None
 
     def log_callback(self, message, level):
-        self.log_output.emit(message, level)
+        self.log_buffer.append(message, level)
 
 
 class SportsUploaderUI(QWidget):
+    # 后台保存配置失败时由写入线程发出，在 GUI 线程中记录日志
+    config_save_failed = Signal(str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("SJTU 校园轻松跑 - Version " + config.global_version)
@@ -78,7 +157,13 @@ class SportsUploaderUI(QWidget):
         self._help_window = None
 
         # 加载配置（供 get_settings_from_ui 使用原始 config 引用）
-        self.config = load_config()
+        self.config = load_config_cached()
+        # 界面控件的初始值；配置文件中的取值无法通过 RunSettings 校验时改用默认值，并在日志中说明
+        self._ui_config, config_error = self.config, None
+        try:
+            RunSettings.from_mapping(self.config)
+        except ValueError as e:
+            self._ui_config, config_error = DEFAULT_CONFIG, str(e)
 
         # 自动保存防抖定时器（500ms 延迟）
         self._auto_save_timer = QTimer(self)
@@ -86,8 +171,24 @@ class SportsUploaderUI(QWidget):
         self._auto_save_timer.setInterval(500)
         self._auto_save_timer.timeout.connect(self._auto_save_config)
 
+        # 日志缓冲与进度通道：工作线程写入，界面每 50ms 取样刷新一次
+        self._log_buffer = LogBuffer(max_pending=LOG_MAX_BLOCKS)
+        self._log_formats = self._create_log_formats()
+        self._last_log_is_progress = False
+        self._progress_channel = None
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(UI_REFRESH_INTERVAL_MS)
+        self._refresh_timer.timeout.connect(self._refresh_from_worker)
+
+        # 配置在后台线程中原子写入，内容未变化时跳过
+        self.config_save_failed.connect(lambda message: self.log_output_text(f"自动保存配置失败: {message}", "error"))
+        self._config_writer = ConfigWriter(on_error=lambda e: self.config_save_failed.emit(str(e)))
+
         self.setup_ui_style()
-        self.init_ui()
+        with PROFILER.measure("SportsUploaderUI.init_ui"):
+            self.init_ui()
+        if config_error is not None:
+            self.log_output_text(f"配置文件中的取值无效（{config_error}），界面已改用默认配置", "warning")
 
         # 设置最小和最大窗口大小供用户调节
         # 最小：确保基本元素可用（如 320 宽）
@@ -317,7 +418,7 @@ class SportsUploaderUI(QWidget):
         run_layout.setSpacing(15)
 
         # 加载当前配置
-        app_config = load_config()
+        app_config = self._ui_config
 
         # --- 模式选择 ---
         mode_layout = QHBoxLayout()
@@ -601,6 +702,8 @@ class SportsUploaderUI(QWidget):
         self.log_output_area.setReadOnly(True)
         self.log_output_area.setFont(QFont("Monospace", 9))
         self.log_output_area.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        # 限制日志行数，超出后自动丢弃最早的行
+        self.log_output_area.document().setMaximumBlockCount(LOG_MAX_BLOCKS)
         scroll_layout.addWidget(self.log_output_area)
 
         top_h_layout.addWidget(self.center_widget)
@@ -671,50 +774,53 @@ class SportsUploaderUI(QWidget):
         self._auto_save_timer.start()
 
     def _auto_save_config(self):
-        """静默自动保存配置到 config.json（不弹出提示框）"""
-        import json
-        from src.config import get_config_path
-        
+        """静默自动保存配置到 config.json（不弹出提示框），实际写入在后台线程完成"""
         try:
-            # 解析指定日期列表
-            dates_text = self.dates_input.text().strip()
-            dates_list = []
-            if dates_text:
-                dates_list = [d.strip() for d in dates_text.split(",") if d.strip()]
-            
-            new_config = {
-                "// 说明": "SJTU 校园跑步工具配置文件",
-                "指定日期模式": self.mode_dates_radio.isChecked(),
-                "指定日期列表": dates_list,
-                "跑步天数": self.days_spin.value(),
-                "参数随机": self.random_params_check.isChecked(),
-                "每日距离_米": self.dist_spin.value(),
-                "配速_分钟每公里": self.pace_spin.value(),
-                "距离最小_米": self.dist_min_spin.value(),
-                "距离最大_米": self.dist_max_spin.value(),
-                "配速最小_分钟每公里": self.pace_min_spin.value(),
-                "配速最大_分钟每公里": self.pace_max_spin.value(),
-                "GPS采样间隔_秒": 3,
-                "跑步时间随机": self.random_time_check.isChecked(),
-                "固定跑步时间_时": self.fixed_hour_spin.value(),
-                "固定跑步时间_分": self.fixed_min_spin.value(),
-                "随机时间范围_开始时": self.rand_start_spin.value(),
-                "随机时间范围_结束时": self.rand_end_spin.value(),
-                "起点纬度": 31.031599,
-                "起点经度": 121.442938,
-                "终点纬度": 31.0264,
-                "终点经度": 121.4551
-            }
-            
-            config_path = get_config_path()
-            with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(new_config, f, ensure_ascii=False, indent=4)
-            
-            # 静默保存成功，不弹出提示框
+            self._config_writer.submit(self._collect_config_from_ui())
         except Exception as e:
             # 自动保存失败时在日志中显示错误（不打扰用户）
             self.log_output_text(f"自动保存配置失败: {e}", "error")
 
+    def _collect_config_from_ui(self):
+        """根据界面控件的当前值构建待保存的配置字典"""
+        # 解析指定日期列表
+        dates_text = self.dates_input.text().strip()
+        dates_list = []
+        if dates_text:
+            dates_list = [d.strip() for d in dates_text.split(",") if d.strip()]
+
+        return {
+            "// 说明": "SJTU 校园跑步工具配置文件",
+            "指定日期模式": self.mode_dates_radio.isChecked(),
+            "指定日期列表": dates_list,
+            "跑步天数": self.days_spin.value(),
+            "参数随机": self.random_params_check.isChecked(),
+            "每日距离_米": self.dist_spin.value(),
+            "配速_分钟每公里": self.pace_spin.value(),
+            "距离最小_米": self.dist_min_spin.value(),
+            "距离最大_米": self.dist_max_spin.value(),
+            "配速最小_分钟每公里": self.pace_min_spin.value(),
+            "配速最大_分钟每公里": self.pace_max_spin.value(),
+            "GPS采样间隔_秒": 3,
+            "跑步时间随机": self.random_time_check.isChecked(),
+            "固定跑步时间_时": self.fixed_hour_spin.value(),
+            "固定跑步时间_分": self.fixed_min_spin.value(),
+            "随机时间范围_开始时": self.rand_start_spin.value(),
+            "随机时间范围_结束时": self.rand_end_spin.value(),
+            "起点纬度": 31.031599,
+            "起点经度": 121.442938,
+            "终点纬度": 31.0264,
+            "终点经度": 121.4551
+        }
+
+    def closeEvent(self, event):
+        """关闭窗口前写入尚未保存的配置"""
+        if self._auto_save_timer.isActive():
+            self._auto_save_timer.stop()
+            self._auto_save_config()
+        self._config_writer.close(timeout=5)
+        super().closeEvent(event)
+
     def get_settings_from_ui(self):
         """从UI获取当前配置并返回字典"""
         try:
@@ -750,7 +856,8 @@ class SportsUploaderUI(QWidget):
             raise Exception(f"获取配置时发生未知错误: {e}")
 
     def start_upload(self):
-        # 先确保配置已保存
+        # 配置交给后台写盘仅用于持久化，本次任务直接使用界面上的取值，不等待写盘完成
+        self._auto_save_timer.stop()
         self._auto_save_config()
         
         # 构建配置摘要供用户确认
@@ -799,13 +906,16 @@ class SportsUploaderUI(QWidget):
         if reply != QMessageBox.Yes:
             return
         
+        self._log_buffer.drain()
         self.log_output_area.clear()
+        self._last_log_is_progress = False
         self.progress_bar.setValue(0)
         self.status_label.setText("状态: 准备中...")
         self.log_output_text("准备开始上传...", "info")
 
         try:
             current_config_to_send = self.get_settings_from_ui()
+            run_settings = RunSettings.from_mapping(self._collect_config_from_ui())
         except (ValueError, Exception) as e:
             self.log_output_text(f"配置错误: {e}", "error")
             self.status_label.setText("状态: 错误")
@@ -817,34 +927,18 @@ class SportsUploaderUI(QWidget):
         self.username_input.setEnabled(False)
         self.password_input.setEnabled(False)
 
-        # 调用 login.py 获取 session，使用 UI 中的用户名/密码
-        try:
-            username = current_config_to_send.get("USER_ID")
-            password = current_config_to_send.get("PASSWORD")
-            session = login.login(username, password)
-            current_config_to_send["SESSION"] = session
-            # USER_ID 即 Jaccount 用户名
-            current_config_to_send["USER_ID"] = username
-        except Exception as e:
-            self.log_output_text(f"登录失败: {e}", "error")
-            QMessageBox.critical(self, "登录失败", str(e))
-            self.start_button.setEnabled(True)
-            self.stop_button.setEnabled(False)
-            self.username_input.setEnabled(True)
-            self.password_input.setEnabled(True)
-            self.info_button.setEnabled(True)
-            return
-
-        self._thread = WorkerThread(current_config_to_send)
-        self._thread.progress_update.connect(self.update_progress)
-        self._thread.log_output.connect(self.log_output_text)
+        # 登录在工作线程中进行，不阻塞界面
+        self._progress_channel = ProgressChannel()
+        self._thread = WorkerThread(current_config_to_send, self._log_buffer, self._progress_channel, settings=run_settings)
+        self._thread.login_failed.connect(lambda message: QMessageBox.critical(self, "登录失败", message))
         self._thread.finished.connect(self.upload_finished)
+        self._refresh_timer.start()
         self._thread.start()
 
     def stop_upload(self):
         """请求工作线程停止。"""
         if self._thread and self._thread.isRunning():
-            self._thread.requestInterruption()
+            self._thread.cancel()
             self.log_output_text("已发送停止请求，请等待任务清理并退出...", "warning")
             self.stop_button.setEnabled(False)
             self.status_label.setText("状态: 正在停止...")
@@ -852,51 +946,74 @@ class SportsUploaderUI(QWidget):
             self.log_output_text("没有运行中的任务可以停止。", "info")
 
 
-    def update_progress(self, current, total, message):
-        """更新进度条和状态信息"""
-        self.progress_bar.setMaximum(total)
-        self.progress_bar.setValue(current)
-        self.status_label.setText(f"状态: {message}")
+    def update_progress(self, state):
+        """根据 ProgressState 更新进度条和状态信息"""
+        if self.progress_bar.maximum() != state.total:
+            self.progress_bar.setMaximum(state.total)
+        self.progress_bar.setValue(state.index)
+        status = f"状态: {state.message}"
+        if state.eta_sec is not None and state.index < state.total:
+            status += f"（预计剩余 {self._format_duration(state.eta_sec)}，{state.throughput_per_min:.1f} 条/分钟）"
+        self.status_label.setText(status)
+
+    @staticmethod
+    def _format_duration(seconds):
+        minutes, seconds = divmod(int(round(seconds)), 60)
+        return f"{minutes}分{seconds:02d}秒" if minutes else f"{seconds}秒"
+
+    def _refresh_from_worker(self):
+        """定时器回调：取出工作线程积累的日志和最新进度并刷新界面。"""
+        self._flush_log_buffer()
+        if self._progress_channel is not None:
+            state = self._progress_channel.take()
+            if state is not None:
+                self.update_progress(state)
 
     def log_output_text(self, message, level="info"):
-        """将日志信息添加到文本区域，并根据级别着色"""
-        cursor = self.log_output_area.textCursor()
-        cursor.movePosition(QTextCursor.End)
-
-        format = QTextCharFormat()
-        if level == "error":
-            format.setForeground(QColor("#DC3545"))
-        elif level == "warning":
-            format.setForeground(QColor("#FFA500"))
-        elif level == "success":
-            format.setForeground(QColor("#4CAF50"))
-        else:
-            format.setForeground(QColor("#333333"))
-
-        # 如果是进度类短消息（例如: 已完成1/25），尝试替换最后一行以便在同一行更新
-        try:
-            if re.match(r"^已完成\d+/\d+", message):
-                # 选择最后一段文本（最后一个 block）并检查是否包含“已完成”关键词
-                doc = self.log_output_area.document()
-                last_block = doc.lastBlock()
-                if last_block.isValid() and "已完成" in last_block.text():
-                    # 选中最后一个 block 并替换
-                    cursor.movePosition(QTextCursor.End)
-                    cursor.select(QTextCursor.BlockUnderCursor)
-                    cursor.removeSelectedText()
-                    # 插入新的进度信息（不额外换行），随后插入换行字符
-                    cursor.insertText(f"[{level.upper()}] {message}\n", format)
-                    self.log_output_area.ensureCursorVisible()
-                    return
-        except Exception:
-            # 如果替换失败，退回到普通追加方式
-            pass
+        """在 GUI 线程中记录日志：先写入缓冲区再立即刷新，保证与工作线程日志的先后顺序。"""
+        self._log_buffer.append(message, level)
+        self._flush_log_buffer()
+
+    @staticmethod
+    def _create_log_formats():
+        formats = {}
+        for level, color in (("error", "#DC3545"), ("warning", "#FFA500"), ("success", "#4CAF50"), ("info", "#333333")):
+            text_format = QTextCharFormat()
+            text_format.setForeground(QColor(color))
+            formats[level] = text_format
+        return formats
+
+    def _flush_log_buffer(self):
+        """将缓冲区中的日志一次性写入文本区域，并根据级别着色。"""
+        entries, dropped = self._log_buffer.drain()
+        if not entries and not dropped:
+            return
 
-        cursor.insertText(f"[{level.upper()}] {message}\n", format)
-        self.log_output_area.ensureCursorVisible()
+        cursor = QTextCursor(self.log_output_area.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        if dropped:
+            cursor.insertText(f"[WARNING] 日志过多，已省略 {dropped} 条\n", self._log_formats["warning"])
+            self._last_log_is_progress = False
+        for message, level in entries:
+            progress = is_progress_message(message)
+            # 进度类短消息（例如: 已完成1/25）紧跟在上一条进度消息之后时，替换上一行以便在同一行更新
+            if progress and self._last_log_is_progress:
+                cursor.movePosition(QTextCursor.PreviousBlock, QTextCursor.KeepAnchor)
+                cursor.removeSelectedText()
+            text_format = self._log_formats.get(level, self._log_formats["info"])
+            cursor.insertText(f"[{level.upper()}] {message}\n", text_format)
+            self._last_log_is_progress = progress
+        cursor.endEditBlock()
+
+        scroll_bar = self.log_output_area.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
 
     def upload_finished(self, success, message):
         """上传任务完成后的处理"""
+        self._refresh_timer.stop()
+        self._refresh_from_worker()
+        self._progress_channel = None
         self.start_button.setEnabled(True)
         self.stop_button.setEnabled(False)
         self.info_button.setEnabled(True)
@@ -947,7 +1064,7 @@ class SportsUploaderUI(QWidget):
                     self._help_window = None
 
             # 创建 HelpWidget 实例并以非模态方式显示
-            self._help_window = HelpWidget()
+            self._help_window = info_dialog.HelpWidget()
             self._help_window.setWindowModality(Qt.WindowModality.NonModal)
             try:
                 self._help_window.installEventFilter(self)
@@ -991,8 +1108,22 @@ class SportsUploaderUI(QWidget):
 
         return super().eventFilter(watched, event)
 
+def _report_startup_profile():
+    """首帧绘制完成后输出启动耗时报告。"""
+    PROFILER.mark("首帧绘制完成")
+    PROFILER.uninstall_import_hook()
+    report_path = PROFILER.report()
+    if report_path:
+        QMessageBox.information(None, "启动耗时统计", f"报告已写入: {report_path}")
+
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    ui = SportsUploaderUI()
-    ui.show()
+    with PROFILER.measure("QApplication()"):
+        app = QApplication(sys.argv)
+    with PROFILER.measure("SportsUploaderUI.__init__"):
+        ui = SportsUploaderUI()
+    with PROFILER.measure("SportsUploaderUI.show"):
+        ui.show()
+    if PROFILER.enabled:
+        QTimer.singleShot(0, _report_startup_profile)
     sys.exit(app.exec())
\ No newline at end of file
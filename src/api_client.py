@@ -1,34 +1,124 @@
 import requests
 import json
-from urllib.parse import quote
+import socket
+import threading
+import weakref
+from urllib.parse import quote, urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from src.payload_encoder import iter_payload_json
 from utils.auxiliary_util import log_output, SportsUploaderError
+from utils.cancellation import OperationCancelled, as_cancel_token, run_cancellable
+from utils.metrics import NULL_METRICS, metered_chunks
 
-def make_request(method, url, headers, params=None, data=None, log_cb=None, stop_check_cb=None, session=None):
-    """通用HTTP请求函数"""
+# 单次请求的超时时间（秒）
+REQUEST_TIMEOUT_SECONDS = 15
+
+
+class _TrackingPoolMixin:
+    """记录已从连接池取出、正在使用的连接，取消时可直接中断其套接字。"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._in_use = weakref.WeakSet()
+        self._in_use_lock = threading.Lock()
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        with self._in_use_lock:
+            self._in_use.add(conn)
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            with self._in_use_lock:
+                self._in_use.discard(conn)
+        super()._put_conn(conn)
+
+    def abort_in_use(self):
+        """关闭正在使用的连接的读写，阻塞在这些连接上的请求会立即以连接错误结束。"""
+        with self._in_use_lock:
+            connections = list(self._in_use)
+        for conn in connections:
+            sock = getattr(conn, "sock", None)
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+class _TrackingHTTPConnectionPool(_TrackingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _TrackingHTTPSConnectionPool(_TrackingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class CancellableHTTPAdapter(HTTPAdapter):
+    """
+    close() 时除释放空闲连接外，还会中断正在进行的请求。
+    取消任务时关闭 session 即可让辅助线程中阻塞的请求立即结束，不会在后台继续占用线程与连接。
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TrackingHTTPConnectionPool,
+            "https": _TrackingHTTPSConnectionPool,
+        }
+
+    def close(self):
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if isinstance(pool, _TrackingPoolMixin):
+                pool.abort_in_use()
+        super().close()
+
+
+def create_session(max_retries=0):
+    """创建挂载 CancellableHTTPAdapter 的 session；关闭 session 会中断其上正在进行的请求。"""
+    session = requests.Session()
+    adapter = CancellableHTTPAdapter(max_retries=max_retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def make_request(method, url, headers, params=None, data=None, log_cb=None, stop_check_cb=None, session=None, metrics=NULL_METRICS):
+    """
+    通用HTTP请求函数
+    传入 stop_check_cb（函数或 CancellationToken）时，请求在辅助线程中执行，停止请求会立即中断等待，
+    并关闭所用的 session 以结束辅助线程中的请求；未提供 session 时为本次请求创建临时 session，用完即关闭。
+    metrics: utils.metrics 中的记录器，记录一次往返的 http 计时（标签 method、path）
+    """
+    response = None
+    owns_session = session is None
+    client = create_session() if owns_session else session
     try:
         if stop_check_cb and stop_check_cb():
             log_output("API请求被中断。", "warning", log_cb)
             raise SportsUploaderError("任务已停止。")
 
-        timeout_value = 15
-
-        response = None
+        timeout_value = REQUEST_TIMEOUT_SECONDS
 
         # 如果提供了 session，则用它发起请求以携带 cookies
-        if session is not None:
-            if method.upper() == 'GET':
-                response = session.get(url, headers=headers, params=params, timeout=timeout_value)
-            elif method.upper() == 'POST':
-                response = session.post(url, headers=headers, data=data, timeout=timeout_value)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+        if method.upper() == 'GET':
+            send = lambda: client.get(url, headers=headers, params=params, timeout=timeout_value)
+        elif method.upper() == 'POST':
+            send = lambda: client.post(url, headers=headers, data=data, timeout=timeout_value)
         else:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, params=params, timeout=timeout_value)
-            elif method.upper() == 'POST':
-                response = requests.post(url, headers=headers, data=data, timeout=timeout_value)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        cancel_token = as_cancel_token(stop_check_cb) if stop_check_cb else None
+        try:
+            with metrics.timer("http", method=method.upper(), path=urlsplit(url).path):
+                response = run_cancellable(send, cancel_token, on_cancel=client.close)
+        except OperationCancelled:
+            log_output("API请求被中断。", "warning", log_cb)
+            raise
 
         if stop_check_cb and stop_check_cb():
             log_output("API响应已获取，但任务被中断。", "warning", log_cb)
@@ -61,9 +151,12 @@ def make_request(method, url, headers, params=None, data=None, log_cb=None, stop
     except json.JSONDecodeError:
         log_output(f"Failed to decode JSON from response: {response.text if response else 'No response'}", "error", log_cb) # type: ignore
         raise SportsUploaderError(f"JSON Decode Error: {response.text if response else 'No response'}") # type: ignore
+    finally:
+        if owns_session:
+            client.close()
 
 
-def get_authorization_token_and_rules(config, log_cb=None, stop_check_cb=None):
+def get_authorization_token_and_rules(config, log_cb=None, stop_check_cb=None, metrics=NULL_METRICS):
     """
     通过GET请求获取Authorization Token，并随后获取跑步规则。
     """
@@ -89,7 +182,7 @@ def get_authorization_token_and_rules(config, log_cb=None, stop_check_cb=None):
     if not config.get("SESSION"):
         common_app_headers["Cookie"] = config.get("COOKIE", "")
 
-    uid_response_data = make_request('GET', config['UID_URL'], common_app_headers, log_cb=log_cb, stop_check_cb=stop_check_cb, session=config.get("SESSION"))
+    uid_response_data = make_request('GET', config['UID_URL'], common_app_headers, log_cb=log_cb, stop_check_cb=stop_check_cb, session=config.get("SESSION"), metrics=metrics)
 
     auth_token = None
     if uid_response_data.get('code') == 0 and 'uid' in uid_response_data.get('data', {}):
@@ -102,7 +195,7 @@ def get_authorization_token_and_rules(config, log_cb=None, stop_check_cb=None):
         raise SportsUploaderError("任务已停止。")
 
     try:
-        make_request('GET', config['MY_DATA_URL'], common_app_headers, log_cb=log_cb, stop_check_cb=stop_check_cb, session=config.get("SESSION"))
+        make_request('GET', config['MY_DATA_URL'], common_app_headers, log_cb=log_cb, stop_check_cb=stop_check_cb, session=config.get("SESSION"), metrics=metrics)
     except Exception as e:
         log_output(f"获取数据失败: {e}", "warning", log_cb)
 
@@ -137,13 +230,16 @@ def get_authorization_token_and_rules(config, log_cb=None, stop_check_cb=None):
     params_string = f"?location={quote(current_location_param, safe='')}"
     url = config["POINT_RULE_URL"]
 
-    point_rule_response_data = make_request('GET', url + params_string, point_rule_headers, log_cb=log_cb, stop_check_cb=stop_check_cb, session=config.get("SESSION"))
+    point_rule_response_data = make_request('GET', url + params_string, point_rule_headers, log_cb=log_cb, stop_check_cb=stop_check_cb, session=config.get("SESSION"), metrics=metrics)
 
     return auth_token, point_rule_response_data.get('data', {})
 
-def upload_running_data(config, auth_token, running_data, log_cb=None, stop_check_cb=None):
+def upload_running_data(config, auth_token, running_data, log_cb=None, stop_check_cb=None, metrics=NULL_METRICS, body_chunks=None):
     """
     上传跑步数据到服务器。
+    请求体由 iter_payload_json 流式编码，以 chunked 方式边编码边发送。
+    body_chunks: 预先编码好的请求体块（iter_payload_json 的输出），提供时直接发送，不再编码 running_data。
+    开启指标时另外记录编码耗时（serialize）与发送字节数（bytes_sent）。
     """
     headers = {
         "Authorization": auth_token,
@@ -158,13 +254,23 @@ def upload_running_data(config, auth_token, running_data, log_cb=None, stop_chec
         log_output("任务被请求停止，正在退出...", "warning", log_cb)
         raise SportsUploaderError("任务已停止。")
 
+    if body_chunks is not None:
+        body = iter(body_chunks)
+        if metrics.enabled:
+            metrics.count("bytes_sent", sum(len(chunk) for chunk in body_chunks))
+    else:
+        body = iter_payload_json(running_data)
+        if metrics.enabled:
+            body = metered_chunks(body, metrics)
+
     response = make_request(
         'POST',
         config["UPLOAD_URL"],
         headers,
-        data=json.dumps(running_data),
+        data=body,
         log_cb=log_cb,
         stop_check_cb=stop_check_cb,
-        session=config.get("SESSION")
+        session=config.get("SESSION"),
+        metrics=metrics
     )
     return response
\ No newline at end of file
@@ -0,0 +1,146 @@
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+# 任务阶段
+PHASE_LOGIN = "login"
+PHASE_AUTH = "auth"
+PHASE_GENERATE = "generate"
+PHASE_UPLOAD = "upload"
+PHASE_DONE = "done"
+PHASE_SKIPPED = "skipped"
+
+# 进度类短消息（例如: 已完成1/25），界面上在同一行原地更新
+_PROGRESS_MESSAGE_RE = re.compile(r"^已完成\d+/\d+")
+
+
+def is_progress_message(message):
+    return _PROGRESS_MESSAGE_RE.match(message) is not None
+
+
+class LogBuffer:
+    """
+    工作线程与界面之间的日志缓冲区。
+    工作线程只向缓冲区追加消息，不逐条发送 Qt 信号；界面按帧（例如每 50ms）取出全部消息后一次性写入控件。
+    缓冲区最多保留 max_pending 条未取出的消息，超出时丢弃最早的消息并计数。
+    """
+
+    def __init__(self, max_pending=5000):
+        self._entries = deque(maxlen=max_pending)
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def append(self, message, level="info"):
+        with self._lock:
+            if len(self._entries) == self._entries.maxlen:
+                self._dropped += 1
+            self._entries.append((message, level))
+
+    def drain(self):
+        """取出所有待显示的消息，返回 (消息列表, 被丢弃的消息数)；连续的进度消息只保留最后一条。"""
+        with self._lock:
+            entries = list(self._entries)
+            dropped = self._dropped
+            self._entries.clear()
+            self._dropped = 0
+        return collapse_progress_runs(entries), dropped
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def collapse_progress_runs(entries):
+    """将连续的进度消息合并为最后一条，其余消息保持顺序不变。"""
+    collapsed = []
+    previous_is_progress = False
+    for message, level in entries:
+        progress = is_progress_message(message)
+        if progress and previous_is_progress:
+            collapsed[-1] = (message, level)
+        else:
+            collapsed.append((message, level))
+        previous_is_progress = progress
+    return collapsed
+
+
+@dataclass(frozen=True, slots=True)
+class ProgressState:
+    """
+    某一时刻的任务进度。
+    index/total 为当前阶段的进度；eta_sec 为预计剩余秒数，throughput_per_min 为每分钟完成的条数，
+    二者仅在上传阶段完成至少一条后才有值，否则为 None。
+    """
+    phase: str
+    index: int
+    total: int
+    message: str
+    elapsed_sec: float
+    eta_sec: float | None = None
+    throughput_per_min: float | None = None
+
+
+class ProgressChannel:
+    """
+    工作线程与界面之间的进度通道，只保留最新的进度。
+    工作线程可任意频繁地调用 publish，界面定时调用 take 取样，跨线程的交互次数与任务条数无关。
+    实例可直接作为 run_sports_upload 的 progress_callback。
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = None
+        self._version = 0
+        self._taken_version = 0
+        self._started = None
+        self._phase = None
+        self._phase_started = None
+
+    def __call__(self, current, total, message, phase=None):
+        self.publish(current, total, message, phase)
+
+    def publish(self, current, total, message, phase=None):
+        now = self._clock()
+        with self._lock:
+            if self._started is None:
+                self._started = now
+            if phase is None:
+                phase = self._phase
+            if phase != self._phase:
+                self._phase = phase
+                self._phase_started = now
+
+            eta_sec = None
+            throughput_per_min = None
+            phase_elapsed = now - self._phase_started
+            if phase == PHASE_UPLOAD and current > 0 and phase_elapsed > 0:
+                seconds_per_item = phase_elapsed / current
+                eta_sec = max(total - current, 0) * seconds_per_item
+                throughput_per_min = 60.0 / seconds_per_item
+
+            self._state = ProgressState(
+                phase=phase,
+                index=current,
+                total=total,
+                message=message,
+                elapsed_sec=now - self._started,
+                eta_sec=eta_sec,
+                throughput_per_min=throughput_per_min,
+            )
+            self._version += 1
+
+    def take(self):
+        """返回自上次 take 以来的最新进度；没有新进度时返回 None。"""
+        with self._lock:
+            if self._version == self._taken_version:
+                return None
+            self._taken_version = self._version
+            return self._state
+
+    @property
+    def latest(self):
+        with self._lock:
+            return self._state
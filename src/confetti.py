@@ -0,0 +1,73 @@
+from array import array
+
+# 每个粒子占用的列：位置、速度、角度、角速度、剩余寿命、尺寸
+_FLOAT_COLUMNS = ("x", "y", "vx", "vy", "angle", "angular_velocity", "life", "width", "height")
+
+
+class ConfettiPool:
+    """
+    预分配的彩带粒子池，按列存储在 array 中，动画过程中不再创建任何对象。
+    粒子失效时与末尾粒子交换后删除（swap-remove），每帧更新为 O(n)。
+    池满时新粒子被忽略。
+    """
+    __slots__ = _FLOAT_COLUMNS + ("color_index", "capacity", "count")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.count = 0
+        for name in _FLOAT_COLUMNS:
+            setattr(self, name, array("d", bytes(8 * capacity)))
+        self.color_index = array("H", bytes(2 * capacity))
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def spawn(self, x, y, vx, vy, width, height, angle, angular_velocity, color_index):
+        """添加一个粒子（寿命为 1.0）；池已满时返回 False。"""
+        i = self.count
+        if i >= self.capacity:
+            return False
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.width[i] = width
+        self.height[i] = height
+        self.angle[i] = angle
+        self.angular_velocity[i] = angular_velocity
+        self.life[i] = 1.0
+        self.color_index[i] = color_index
+        self.count = i + 1
+        return True
+
+    def step(self, gravity, drag, fade, max_y):
+        """推进一帧：先加重力再乘阻力，更新位置、角度与寿命，移除寿命耗尽或落出 max_y 的粒子。"""
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        angle, angular_velocity, life = self.angle, self.angular_velocity, self.life
+        i = 0
+        while i < self.count:
+            new_vx = (vx[i] + gravity[0]) * drag
+            new_vy = (vy[i] + gravity[1]) * drag
+            vx[i] = new_vx
+            vy[i] = new_vy
+            x[i] += new_vx
+            y[i] += new_vy
+            angle[i] += angular_velocity[i]
+            life[i] -= fade
+            if life[i] <= 0 or y[i] > max_y:
+                self._swap_remove(i)
+                # 交换进来的末尾粒子尚未更新，留在位置 i 继续处理
+                continue
+            i += 1
+
+    def _swap_remove(self, i):
+        last = self.count - 1
+        if i != last:
+            for name in _FLOAT_COLUMNS:
+                column = getattr(self, name)
+                column[i] = column[last]
+            self.color_index[i] = self.color_index[last]
+        self.count = last
@@ -1,7 +1,13 @@
+import copy
 import json
+import math
 import os
 import shutil
 import sys
+import tempfile
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
 
 global_version = "2.1.1"
 
@@ -43,7 +49,6 @@ def get_config_path():
         os.makedirs(config_dir, exist_ok=True)
     except OSError:
         # 极端情况下用户目录不可写,退回临时目录,至少本次运行可用
-        import tempfile
         config_dir = os.path.join(tempfile.gettempdir(), APP_NAME)
         os.makedirs(config_dir, exist_ok=True)
 
@@ -60,29 +65,40 @@ def get_config_path():
 
     return config_path
 
-def load_config():
+# 默认配置
+DEFAULT_CONFIG = MappingProxyType({
+    "指定日期模式": False,
+    "指定日期列表": [],
+    "跑步天数": 25,
+    "每日距离_米": 5000,
+    "配速_分钟每公里": 3.5,
+    "GPS采样间隔_秒": 3,
+    "跑步时间随机": False,
+    "固定跑步时间_时": 8,
+    "固定跑步时间_分": 0,
+    "随机时间范围_开始时": 7,
+    "随机时间范围_结束时": 20,
+    "起点纬度": 31.031599,
+    "起点经度": 121.442938,
+    "终点纬度": 31.0264,
+    "终点经度": 121.4551
+})
+
+# load_config_cached 的缓存：(配置路径, (mtime_ns, size), 快照)
+_cached_config_path = None
+_cached_config_stat = None
+_cached_config_snapshot = None
+_cache_lock = threading.Lock()
+
+_save_lock = threading.Lock()
+
+def load_config(config_path=None):
     """从 config.json 加载配置"""
-    config_path = get_config_path()
-    
-    # 默认配置
-    default_config = {
-        "指定日期模式": False,
-        "指定日期列表": [],
-        "跑步天数": 25,
-        "每日距离_米": 5000,
-        "配速_分钟每公里": 3.5,
-        "GPS采样间隔_秒": 3,
-        "跑步时间随机": False,
-        "固定跑步时间_时": 8,
-        "固定跑步时间_分": 0,
-        "随机时间范围_开始时": 7,
-        "随机时间范围_结束时": 20,
-        "起点纬度": 31.031599,
-        "起点经度": 121.442938,
-        "终点纬度": 31.0264,
-        "终点经度": 121.4551
-    }
-    
+    if config_path is None:
+        config_path = get_config_path()
+
+    default_config = copy.deepcopy(dict(DEFAULT_CONFIG))
+
     if os.path.exists(config_path):
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
@@ -92,4 +108,250 @@ def load_config():
         except Exception as e:
             print(f"加载配置文件失败: {e}，使用默认配置")
     
-    return default_config
\ No newline at end of file
+    return default_config
+
+def save_config(new_config, config_path=None):
+    """将配置原子地写入 config.json，返回是否实际发生了写入。
+
+    序列化结果与磁盘上的内容相同时跳过写入；否则先写入同目录下的临时文件，
+    再通过 os.replace 替换，避免写入中途崩溃导致配置文件被截断。
+    """
+    if config_path is None:
+        config_path = get_config_path()
+
+    content = json.dumps(new_config, ensure_ascii=False, indent=4)
+
+    with _save_lock:
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                if f.read() == content:
+                    return False
+        except (OSError, UnicodeDecodeError):
+            pass
+
+        config_dir = os.path.dirname(config_path) or "."
+        fd, temp_path = tempfile.mkstemp(prefix=".config-", suffix=".json.tmp", dir=config_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                # mkstemp 创建的文件权限为 0600，沿用原配置文件的权限
+                os.chmod(temp_path, os.stat(config_path).st_mode & 0o777)
+            except OSError:
+                pass
+            os.replace(temp_path, config_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        return True
+
+class ConfigWriter:
+    """在后台线程中保存配置，避免磁盘较慢时阻塞 GUI 线程。
+
+    submit 只记录最新的一份配置，尚未写入的旧配置会被直接覆盖；
+    写入失败时在后台线程中调用 on_error(exception)。
+    """
+
+    def __init__(self, config_path=None, on_error=None):
+        self._config_path = config_path
+        self._on_error = on_error
+        self._condition = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="ConfigWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, new_config):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("ConfigWriter 已关闭")
+            self._pending = new_config
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """等待已提交的配置全部写入，超时返回 False。"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def close(self, timeout=None):
+        """写完剩余配置后停止后台线程。"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                new_config, self._pending = self._pending, None
+                self._busy = True
+            try:
+                save_config(new_config, self._config_path)
+            except Exception as e:
+                if self._on_error:
+                    self._on_error(e)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+def load_config_snapshot(config_path=None):
+    """加载配置，返回只读快照；取值的校验统一由 RunSettings.from_mapping 负责。
+
+    一次任务只应加载一次，并将快照沿流水线传递，避免在每次生成数据时重复读盘与解析 JSON。
+    """
+    snapshot = load_config(config_path)
+    dates = snapshot.get("指定日期列表")
+    if isinstance(dates, list):
+        snapshot["指定日期列表"] = tuple(dates)
+    return MappingProxyType(snapshot)
+
+def load_config_cached():
+    """带缓存的 load_config_snapshot，供 GUI 频繁读取配置使用。
+
+    配置路径只解析一次；文件的修改时间与大小未变化时直接返回上次的快照。
+    """
+    global _cached_config_path, _cached_config_stat, _cached_config_snapshot
+
+    with _cache_lock:
+        if _cached_config_path is None:
+            _cached_config_path = get_config_path()
+
+        try:
+            st = os.stat(_cached_config_path)
+            stat_key = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stat_key = None
+
+        if _cached_config_snapshot is None or stat_key != _cached_config_stat:
+            _cached_config_snapshot = load_config_snapshot(_cached_config_path)
+            _cached_config_stat = stat_key
+
+        return _cached_config_snapshot
+
+
+# 1 度纬度约等于 111111 米，1 度经度约等于 111111 * cos(lat) 米
+METERS_PER_DEGREE_LAT = 111111
+
+@dataclass(frozen=True, slots=True)
+class RunSettings:
+    """经过校验的跑步配置，附带预先计算好的派生量，整个任务内只构建一次。"""
+    use_specific_dates: bool
+    specific_dates: tuple
+    run_days: int
+    use_random_params: bool
+    distance_m: int
+    pace_min_per_km: float
+    distance_min_m: int
+    distance_max_m: int
+    pace_min_min_per_km: float
+    pace_max_min_per_km: float
+    interval_seconds: int
+    use_random_time: bool
+    fixed_hour: int
+    fixed_minute: int
+    random_start_hour: int
+    random_end_hour: int
+    start_latitude: float
+    start_longitude: float
+    end_latitude: float
+    end_longitude: float
+    # 派生量
+    interval_ms: int
+    meters_per_degree_lon: float
+    total_duration_sec: int
+    speed_mps: float | None
+
+    @classmethod
+    def from_mapping(cls, raw_config):
+        """由 load_config 形式的中文键字典构建，取值不合法时抛出 ValueError。"""
+        def number(key, default, cast):
+            value = raw_config.get(key, default)
+            if isinstance(value, bool):
+                raise ValueError(f"配置项 {key} 应为数字: {value!r}")
+            try:
+                return cast(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"配置项 {key} 应为数字: {value!r}") from None
+
+        distance_m = number("每日距离_米", 5000, int)
+        pace_min_per_km = number("配速_分钟每公里", 3.5, float)
+        distance_min_m = number("距离最小_米", 4000, int)
+        distance_max_m = number("距离最大_米", 6000, int)
+        pace_min_min_per_km = number("配速最小_分钟每公里", 3.5, float)
+        pace_max_min_per_km = number("配速最大_分钟每公里", 5.0, float)
+        random_start_hour = number("随机时间范围_开始时", 7, int)
+        random_end_hour = number("随机时间范围_结束时", 20, int)
+        start_latitude = number("起点纬度", 31.031599, float)
+
+        use_random_params = bool(raw_config.get("参数随机", False))
+        use_random_time = bool(raw_config.get("跑步时间随机", False))
+
+        if distance_m <= 0 or pace_min_per_km <= 0:
+            raise ValueError("每日距离与配速必须为正数")
+        # 范围只在对应的随机模式开启时使用，关闭时界面中残留的无效范围不影响任务
+        if use_random_params and distance_min_m > distance_max_m:
+            raise ValueError(f"距离范围无效: {distance_min_m} ~ {distance_max_m}")
+        if use_random_params and pace_min_min_per_km > pace_max_min_per_km:
+            raise ValueError(f"配速范围无效: {pace_min_min_per_km} ~ {pace_max_min_per_km}")
+        if use_random_time and random_start_hour > random_end_hour:
+            raise ValueError(f"随机时间范围无效: {random_start_hour} ~ {random_end_hour}")
+
+        interval_seconds = number("GPS采样间隔_秒", 3, int)
+        if interval_seconds <= 0:
+            interval_seconds = 3
+
+        dates = raw_config.get("指定日期列表") or ()
+        if not isinstance(dates, (list, tuple)):
+            raise ValueError(f"配置项 指定日期列表 应为列表: {dates!r}")
+
+        # 固定参数模式下的时长与速度与每次生成无关，可预先计算
+        total_duration_sec, speed_mps = run_duration_and_speed(distance_m, pace_min_per_km)
+
+        return cls(
+            use_specific_dates=bool(raw_config.get("指定日期模式", False)),
+            specific_dates=tuple(str(d) for d in dates),
+            run_days=number("跑步天数", 25, int),
+            use_random_params=use_random_params,
+            distance_m=distance_m,
+            pace_min_per_km=pace_min_per_km,
+            distance_min_m=distance_min_m,
+            distance_max_m=distance_max_m,
+            pace_min_min_per_km=pace_min_min_per_km,
+            pace_max_min_per_km=pace_max_min_per_km,
+            interval_seconds=interval_seconds,
+            use_random_time=use_random_time,
+            fixed_hour=number("固定跑步时间_时", 8, int),
+            fixed_minute=number("固定跑步时间_分", 0, int),
+            random_start_hour=random_start_hour,
+            random_end_hour=random_end_hour,
+            start_latitude=start_latitude,
+            start_longitude=number("起点经度", 121.442938, float),
+            end_latitude=number("终点纬度", 31.0264, float),
+            end_longitude=number("终点经度", 121.4551, float),
+            interval_ms=interval_seconds * 1000,
+            meters_per_degree_lon=METERS_PER_DEGREE_LAT * math.cos(math.radians(start_latitude)),
+            total_duration_sec=total_duration_sec,
+            speed_mps=speed_mps,
+        )
+
+def run_duration_and_speed(distance_m, pace_min_per_km):
+    """由距离与配速计算总时长（秒，取整）与速度（m/s）；时长为 0 时速度为 None。"""
+    pace_sec_per_km = pace_min_per_km * 60  # 转为秒/公里
+    total_duration_sec = int(round(pace_sec_per_km * (distance_m / 1000.0)))
+    speed_mps = distance_m / total_duration_sec if total_duration_sec > 0 else None
+    return total_duration_sec, speed_mps
+
+def load_run_settings(config_path=None):
+    """加载配置并构建 RunSettings。"""
+    return RunSettings.from_mapping(load_config_snapshot(config_path))
@@ -2,8 +2,13 @@ import math
 import uuid
 import time
 import random
-from src.config import load_config
-from utils.auxiliary_util import haversine_distance, log_output, TRACK_POINT_DECIMAL_PLACES, get_current_epoch_ms, SportsUploaderError
+from array import array
+from src.config import RunSettings, load_run_settings, run_duration_and_speed
+from src.track import TrackPoints
+from utils.auxiliary_util import haversine_distance, log_output, TRACK_POINT_DECIMAL_PLACES, get_current_epoch_ms, SportsUploaderError, round_coordinates, format_locations, np
+
+# 是否使用 NumPy 向量化引擎生成轨迹；两种引擎的输出逐字节一致
+USE_NUMPY_ENGINE = np is not None
 
 def interpolate_points(start_lat, start_lon, end_lat, end_lon, speed_mps, interval_seconds):
     """
@@ -42,21 +47,26 @@ def interpolate_points(start_lat, start_lon, end_lat, end_lon, speed_mps, interv
         })
         return points, segment_distance, math.ceil(segment_duration_seconds)
 
+    interp_lats = []
+    interp_lons = []
     for i in range(num_steps + 1):
         fraction = i / num_steps
 
         interp_lat_rad = start_lat_rad + fraction * (end_lat_rad - start_lat_rad)
         interp_lon_rad = start_lon_rad + fraction * (end_lon_rad - start_lon_rad)
 
-        interp_lat = math.degrees(interp_lat_rad)
-        interp_lon = math.degrees(interp_lon_rad)
+        interp_lats.append(math.degrees(interp_lat_rad))
+        interp_lons.append(math.degrees(interp_lon_rad))
 
-        formatted_lat = f"{interp_lat:.{TRACK_POINT_DECIMAL_PLACES}f}"
-        formatted_lon = f"{interp_lon:.{TRACK_POINT_DECIMAL_PLACES}f}"
+    # 坐标取整与 location 字符串均批量生成
+    rounded_lats = round_coordinates(interp_lats)
+    rounded_lons = round_coordinates(interp_lons)
+    locations = format_locations(interp_lons, interp_lats)
 
+    for latitude, longitude, location in zip(rounded_lats, rounded_lons, locations):
         points.append({
-            "latLng": {"latitude": float(formatted_lat), "longitude": float(formatted_lon)},
-            "location": f"{formatted_lon},{formatted_lat}",
+            "latLng": {"latitude": latitude, "longitude": longitude},
+            "location": location,
             "step": 0
         })
 
@@ -76,8 +86,8 @@ def interpolate_points(start_lat, start_lon, end_lat, end_lon, speed_mps, interv
 
 def split_track_into_segments(all_points_with_time, total_duration_sec, min_segment_points=5, stop_check_cb=None):
     """
-    将所有带有locatetime的轨迹点拆分为多个轨迹段。
-    并分配不同的 status 和 tstate。
+    将所有带有locatetime的轨迹点（TrackPoints）拆分为多个轨迹段。
+    并分配不同的 status 和 tstate；各段的 points 为指向原容器的零拷贝视图。
     """
     tracks = []
 
@@ -89,17 +99,19 @@ def split_track_into_segments(all_points_with_time, total_duration_sec, min_segm
 
     current_start_point_idx = 0
 
-    if not all_points_with_time:
+    total_points = len(all_points_with_time)
+    if not total_points:
         return tracks
 
-    while current_start_point_idx < len(all_points_with_time):
+    # 整条轨迹的累计距离索引只计算一次，各段距离由差值直接得到
+    all_points_with_time.cumulative_distances()
+
+    while current_start_point_idx < total_points:
         if stop_check_cb and stop_check_cb():
             log_output("轨迹生成被中断。", "warning")
             raise SportsUploaderError("任务已停止。")
 
-        segment_points = []
-
-        remaining_points = len(all_points_with_time) - current_start_point_idx
+        remaining_points = total_points - current_start_point_idx
         if remaining_points <= min_segment_points:
             segment_length = remaining_points
         else:
@@ -107,10 +119,10 @@ def split_track_into_segments(all_points_with_time, total_duration_sec, min_segm
             if segment_length == 1 and remaining_points > 1:
                 segment_length = min_segment_points
 
-        segment_points = all_points_with_time[current_start_point_idx: current_start_point_idx + segment_length]
+        segment_points = all_points_with_time.segment(current_start_point_idx, current_start_point_idx + segment_length)
         current_start_point_idx += segment_length
 
-        if not segment_points:
+        if not len(segment_points):
             continue
 
         rand_val = random.random()
@@ -123,15 +135,10 @@ def split_track_into_segments(all_points_with_time, total_duration_sec, min_segm
 
         segment_tstate = status_map.get(segment_status, "0")
 
-        segment_distance = 0
-        if len(segment_points) > 1:
-            for i in range(len(segment_points) - 1):
-                p1 = segment_points[i]['latLng']
-                p2 = segment_points[i + 1]['latLng']
-                segment_distance += haversine_distance(p1['latitude'], p1['longitude'], p2['latitude'], p2['longitude'])
+        segment_distance = segment_points.distance
 
-        segment_start_time_ms = segment_points[0]['locatetime']
-        segment_end_time_ms = segment_points[-1]['locatetime']
+        segment_start_time_ms = segment_points.first_locatetime
+        segment_end_time_ms = segment_points.last_locatetime
         segment_duration_sec = math.ceil((segment_end_time_ms - segment_start_time_ms) / 1000)
 
         tracks.append({
@@ -149,36 +156,85 @@ def split_track_into_segments(all_points_with_time, total_duration_sec, min_segm
     return tracks
 
 
-def generate_running_data_payload(config, required_signpoints, point_rules_data, log_cb=None, stop_check_cb=None):
+def _track_columns_python(num_points, interval_seconds, total_duration_sec, speed_mps, target_distance_m,
+                          start_lon, meters_per_degree_lon, start_time_ms, stop_check_cb=None):
+    """
+    逐点计算每个采样点的经度与 locatetime（纯 Python 引擎）。
+    返回 (经度列表, locatetime 列表)，经度为未格式化的原始浮点数。
+    """
+    point_lons = []
+    point_locatetimes = []
+    current_locatetime_ms = start_time_ms
+
+    for i in range(num_points):
+        if stop_check_cb and stop_check_cb():
+            log_output("轨迹生成被中断。", "warning")
+            raise SportsUploaderError("任务已停止。")
+
+        elapsed_sec = min(i * interval_seconds, total_duration_sec)
+        traveled_m = min(elapsed_sec * speed_mps, target_distance_m)
+
+        delta_lon_deg = traveled_m / meters_per_degree_lon if meters_per_degree_lon != 0 else 0
+        point_lons.append(start_lon + delta_lon_deg)
+        point_locatetimes.append(current_locatetime_ms)
+        current_locatetime_ms += interval_seconds * 1000
+
+    return point_lons, point_locatetimes
+
+
+def _track_columns_numpy(num_points, interval_seconds, total_duration_sec, speed_mps, target_distance_m,
+                         start_lon, meters_per_degree_lon, start_time_ms, stop_check_cb=None):
+    """
+    以数组形式一次性计算所有采样点的已用时长、累计距离、经度偏移与 locatetime（NumPy 引擎）。
+    逐元素运算与纯 Python 引擎完全相同，因此结果逐位一致；经度以 ndarray 返回，供后续批量取整。
+    """
+    index = np.arange(num_points, dtype=np.int64)
+
+    elapsed_sec = np.minimum(index * interval_seconds, total_duration_sec)
+    traveled_m = np.minimum(elapsed_sec * speed_mps, target_distance_m)
+    if meters_per_degree_lon != 0:
+        delta_lon_deg = traveled_m / meters_per_degree_lon
+    else:
+        delta_lon_deg = np.zeros(num_points, dtype=np.float64)
+    point_lons = start_lon + delta_lon_deg
+    point_locatetimes = start_time_ms + index * (interval_seconds * 1000)
+
+    if stop_check_cb and stop_check_cb():
+        log_output("轨迹生成被中断。", "warning")
+        raise SportsUploaderError("任务已停止。")
+
+    return point_lons, array('q', point_locatetimes.tobytes())
+
+
+def _build_track_points(point_lat, point_lons, point_locatetimes):
+    """将按列计算的轨迹数据批量取整后写入 TrackPoints（同一纬度）。"""
+    longitudes = round_coordinates(point_lons)
+    latitudes = round_coordinates([point_lat]) * len(longitudes)
+    return TrackPoints(latitudes, longitudes, point_locatetimes)
+
+
+def generate_running_data_payload(config, required_signpoints, point_rules_data, log_cb=None, stop_check_cb=None, settings=None):
     """
     生成符合POST请求体格式的跑步数据，并整合打卡点。
+    settings 为本次任务的 RunSettings（也可传入配置字典），未提供时才从磁盘加载。
     """
-    # 从配置文件读取参数
-    app_config = load_config()
-    
-    # 判断是否使用随机参数
-    use_random_params = app_config.get("参数随机", False)
-    
-    if use_random_params:
-        # 随机距离
-        dist_min = app_config.get("距离最小_米", 4000)
-        dist_max = app_config.get("距离最大_米", 6000)
-        target_distance_m = random.randint(dist_min, dist_max)
-        
-        # 随机配速
-        pace_min = app_config.get("配速最小_分钟每公里", 3.5)
-        pace_max = app_config.get("配速最大_分钟每公里", 5.0)
-        pace_min_per_km = round(random.uniform(pace_min, pace_max), 1)
+    if settings is None:
+        settings = load_run_settings()
+    elif not isinstance(settings, RunSettings):
+        settings = RunSettings.from_mapping(settings)
+
+    if settings.use_random_params:
+        # 随机距离与配速
+        target_distance_m = random.randint(settings.distance_min_m, settings.distance_max_m)
+        pace_min_per_km = round(random.uniform(settings.pace_min_min_per_km, settings.pace_max_min_per_km), 1)
+        total_duration_sec, speed_mps = run_duration_and_speed(target_distance_m, pace_min_per_km)
     else:
-        target_distance_m = app_config.get("每日距离_米", 5000)
-        pace_min_per_km = app_config.get("配速_分钟每公里", 3.5)
-    
-    pace_sec_per_km = pace_min_per_km * 60  # 转为秒/公里
-    total_duration_sec = int(round(pace_sec_per_km * (target_distance_m / 1000.0)))
+        # 固定参数的时长与速度已在 RunSettings 中预先计算
+        target_distance_m = settings.distance_m
+        total_duration_sec = settings.total_duration_sec
+        speed_mps = settings.speed_mps
 
-    interval_seconds = int(app_config.get("GPS采样间隔_秒", config.get('INTERVAL_SECONDS', 3)))
-    if interval_seconds <= 0:
-        interval_seconds = 3
+    interval_seconds = settings.interval_seconds
 
     # 计算每个采样点的数量（包含起点和终点）
     num_intervals = max(1, math.ceil(total_duration_sec / interval_seconds))
@@ -186,52 +242,34 @@ def generate_running_data_payload(config, required_signpoints, point_rules_data,
     num_points = num_intervals + 1
 
     # 计算每秒速度（m/s）
-    speed_mps = target_distance_m / total_duration_sec if total_duration_sec > 0 else config.get('RUNNING_SPEED_MPS', 2.5)
-
-    # 起点经纬度（优先从配置文件读取）
-    start_lat = float(app_config.get("起点纬度", config.get('START_LATITUDE', 31.031599)))
-    start_lon = float(app_config.get("起点经度", config.get('START_LONGITUDE', 121.442938)))
-
-    # 简单的经度偏移计算：在相同纬度上向东移动累计距离以达到目标距离。
-    # 1度纬度约等于 111111 米，1度经度约等于 111111 * cos(lat) 米
-    lat_rad = math.radians(start_lat)
-    meters_per_degree_lon = 111111 * math.cos(lat_rad)
+    if speed_mps is None:
+        speed_mps = config.get('RUNNING_SPEED_MPS', 2.5)
 
-    full_interpolated_points_with_time = []
+    # 简单的经度偏移计算：在相同纬度上向东移动累计距离以达到目标距离
+    start_lat = settings.start_latitude
+    start_lon = settings.start_longitude
+    meters_per_degree_lon = settings.meters_per_degree_lon
 
     current_locatetime_ms = config['START_TIME_EPOCH_MS'] if config.get('START_TIME_EPOCH_MS') is not None else get_current_epoch_ms()
 
-    for i in range(num_points):
-        if stop_check_cb and stop_check_cb():
-            log_output("轨迹生成被中断。", "warning")
-            raise SportsUploaderError("任务已停止。")
-
-        elapsed_sec = min(i * interval_seconds, total_duration_sec)
-        traveled_m = min(elapsed_sec * speed_mps, target_distance_m)
-
-        delta_lon_deg = traveled_m / meters_per_degree_lon if meters_per_degree_lon != 0 else 0
-        point_lat = start_lat
-        point_lon = start_lon + delta_lon_deg
+    if stop_check_cb and stop_check_cb():
+        log_output("轨迹生成被中断。", "warning")
+        raise SportsUploaderError("任务已停止。")
 
-        formatted_lat = f"{point_lat:.{TRACK_POINT_DECIMAL_PLACES}f}"
-        formatted_lon = f"{point_lon:.{TRACK_POINT_DECIMAL_PLACES}f}"
+    build_columns = _track_columns_numpy if USE_NUMPY_ENGINE else _track_columns_python
+    point_lons, point_locatetimes = build_columns(
+        num_points, interval_seconds, total_duration_sec, speed_mps, target_distance_m,
+        start_lon, meters_per_degree_lon, current_locatetime_ms, stop_check_cb=stop_check_cb
+    )
 
-        point = {
-            "latLng": {"latitude": float(formatted_lat), "longitude": float(formatted_lon)},
-            "location": f"{formatted_lon},{formatted_lat}",
-            "step": 0,
-            "locatetime": current_locatetime_ms
-        }
-
-        full_interpolated_points_with_time.append(point)
-        current_locatetime_ms += interval_seconds * 1000
+    full_interpolated_points_with_time = _build_track_points(start_lat, point_lons, point_locatetimes)
 
     total_overall_distance = target_distance_m
 
     actual_total_duration_sec = 0
-    if full_interpolated_points_with_time:
-        first_point_time_ms = full_interpolated_points_with_time[0]['locatetime']
-        last_point_time_ms = full_interpolated_points_with_time[-1]['locatetime']
+    if len(full_interpolated_points_with_time):
+        first_point_time_ms = full_interpolated_points_with_time.locatetimes[0]
+        last_point_time_ms = full_interpolated_points_with_time.locatetimes[-1]
         actual_total_duration_sec = math.ceil((last_point_time_ms - first_point_time_ms + config['INTERVAL_SECONDS'] * 1000) / 1000)
 
     tracks_list = split_track_into_segments(full_interpolated_points_with_time, actual_total_duration_sec, stop_check_cb=stop_check_cb)
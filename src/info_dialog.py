@@ -4,9 +4,10 @@ import os
 from utils.auxiliary_util import get_base_path
 
 import src.config as config
+from src.confetti import ConfettiPool
 
 from PySide6.QtCore import (QCoreApplication, QDate, QDateTime, QLocale,
-    QMetaObject, QObject, QPoint, QRect,
+    QMetaObject, QObject, QPoint, QRect, QResource,
     QSize, QTime, QUrl, Qt)
 from PySide6.QtGui import (QAction, QBrush, QColor, QConicalGradient,
     QCursor, QFont, QFontDatabase, QGradient,
@@ -18,13 +19,26 @@ from PySide6.QtWidgets import (QApplication, QFrame, QHBoxLayout, QHeaderView,
     QPushButton, QSizePolicy, QStatusBar, QTableView,
     QWidget, QInputDialog, QMessageBox, QVBoxLayout, QAbstractItemView,
     QStyledItemDelegate, QStyleOptionViewItem, QToolTip)
-import assets.resources_rc as resources_rc
-from PySide6.QtCore import QModelIndex, QEvent, QTimer, QPointF, QRectF, QSizeF, Qt
+from PySide6.QtCore import QModelIndex, QEvent, QTimer, QElapsedTimer, QPointF, QRectF, QSizeF, Qt
 
 RESOURCES_SUB_DIR = "assets"
 
 RESOURCES_FULL_PATH = os.path.join(get_base_path(), RESOURCES_SUB_DIR)
 
+# 关于窗口使用的 Qt 资源（:/resources/...）以二进制 rcc 文件分发，首次打开窗口时才注册
+RESOURCES_RCC_PATH = os.path.join(RESOURCES_FULL_PATH, "resources.rcc")
+
+_resources_registered = False
+
+def ensure_resources_loaded():
+    """按需注册 resources.rcc；Qt 会直接映射该文件，无需在启动时解析庞大的 Python 字节串。"""
+    global _resources_registered
+    if not _resources_registered:
+        _resources_registered = QResource.registerResource(RESOURCES_RCC_PATH)
+        if not _resources_registered:
+            print(f"加载资源文件失败: {RESOURCES_RCC_PATH}")
+    return _resources_registered
+
 class Ui_HelpWindow(object):
     def setupUi(self, HelpWindow):
         if not HelpWindow.objectName():
@@ -131,6 +145,38 @@ class Ui_HelpWindow(object):
         self.thankYouLabel.setText(QCoreApplication.translate("HelpWindow", u"<html><head/><body><p><span style=\" font-size:20pt;\">感谢您的使用！</span></p></body></html>", None))
     # retranslateUi
 
+# --- 彩带颜色与预渲染贴图 ---
+CONFETTI_COLORS = (
+    "#f44336", "#e91e63", "#9c27b0",
+    "#673ab7", "#3f51b5", "#2196f3",
+    "#03a9f4", "#00bcd4", "#009688",
+    "#4caf50", "#8bc34a", "#cddc39",
+    "#ffeb3b", "#ffc107", "#ff9800"
+)
+# 贴图按最大彩带尺寸绘制，四周留 1px 透明边以便旋转缩放后边缘平滑
+CONFETTI_SPRITE_WIDTH = 10
+CONFETTI_SPRITE_HEIGHT = 15
+_CONFETTI_SPRITE_MARGIN = 1
+
+_confetti_sprites = None
+
+def get_confetti_sprites():
+    """按颜色缓存的彩带贴图，首次使用时创建（需已存在 QApplication）。"""
+    global _confetti_sprites
+    if _confetti_sprites is None:
+        sprites = []
+        for color in CONFETTI_COLORS:
+            pixmap = QPixmap(CONFETTI_SPRITE_WIDTH + 2 * _CONFETTI_SPRITE_MARGIN,
+                             CONFETTI_SPRITE_HEIGHT + 2 * _CONFETTI_SPRITE_MARGIN)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            painter.fillRect(_CONFETTI_SPRITE_MARGIN, _CONFETTI_SPRITE_MARGIN,
+                             CONFETTI_SPRITE_WIDTH, CONFETTI_SPRITE_HEIGHT, QColor(color))
+            painter.end()
+            sprites.append(pixmap)
+        _confetti_sprites = sprites
+    return _confetti_sprites
+
 # --- 创建一个专门用于绘制彩带的透明遮罩层类 ---
 class ConfettiOverlay(QWidget):
     def __init__(self, parent=None):
@@ -141,57 +187,50 @@ class ConfettiOverlay(QWidget):
         self.setStyleSheet("background: transparent;")
 
     def paintEvent(self, event):
-        """只在这个遮罩层上绘制彩带"""
-        # 从父窗口获取粒子列表
-        particles = self.parent().particles
-        if not particles:
+        """只在这个遮罩层上绘制彩带：每个粒子以贴图片段绘制，旋转、缩放与透明度由片段参数给出"""
+        # 从父窗口获取粒子池
+        pool = self.parent().confetti
+        if not pool.count:
             return
 
+        sprites = get_confetti_sprites()
+        source = QRectF(sprites[0].rect())
+        create_fragment = QPainter.PixmapFragment.create
+        x, y, angle, life = pool.x, pool.y, pool.angle, pool.life
+        width, height, color_index = pool.width, pool.height, pool.color_index
+
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        for particle in particles:
-            color = QColor(particle.color)
-            color.setAlphaF(max(0, particle.life))
-
-            painter.setBrush(QBrush(color))
-            painter.setPen(Qt.PenStyle.NoPen)
-
-            painter.save()
-            painter.translate(particle.pos)
-            painter.rotate(particle.angle)
-            rect = QRectF(-particle.size.width() / 2, -particle.size.height() / 2,
-                          particle.size.width(), particle.size.height())
-            painter.drawRect(rect)
-            painter.restore()
-
-# --- 彩带粒子类 ---
-class ConfettiParticle:
-    """代表一片彩带的类"""
-    def __init__(self, pos, velocity, color, size, angular_velocity):
-        self.pos = pos
-        self.velocity = velocity
-        self.color = color
-        self.size = size
-        self.angle = random.uniform(0, 360)
-        self.angular_velocity = angular_velocity
-        self.life = 1.0
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        for i in range(pool.count):
+            fragment = create_fragment(
+                QPointF(x[i], y[i]), source,
+                width[i] / CONFETTI_SPRITE_WIDTH, height[i] / CONFETTI_SPRITE_HEIGHT,
+                angle[i], max(0.0, life[i])
+            )
+            painter.drawPixmapFragments(fragment, 1, sprites[color_index[i]])
+        painter.end()
 
 # --- 窗口类 ---
 class HelpWidget(QWidget):
     # 动画参数和物理常量
-    GRAVITY = QPointF(0, 0.08)
+    GRAVITY = (0.0, 0.08)
     DRAG = 0.99
     FADE_SPEED = 0.01
     SPRAY_DURATION_FRAMES = 120
     PARTICLES_PER_FRAME_PER_SIDE = 3
+    # 每帧时长（毫秒）；定时器回调按实际经过的时间推进相应帧数，单次最多追赶 MAX_FRAMES_PER_TICK 帧
+    FRAME_INTERVAL_MS = 16
+    MAX_FRAMES_PER_TICK = 4
+    # 粒子池容量：喷射阶段产生的粒子总数
+    CONFETTI_CAPACITY = SPRAY_DURATION_FRAMES * PARTICLES_PER_FRAME_PER_SIDE * 2
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        ensure_resources_loaded()
         self.ui = Ui_HelpWindow()
         self.ui.setupUi(self)
 
-        self.particles = []
+        self.confetti = ConfettiPool(self.CONFETTI_CAPACITY)
         self.background_pixmap = QPixmap(":/resources/bg.png")
         # 当点击关于窗口的“确定”按钮时，隐藏此窗口
         try:
@@ -203,11 +242,14 @@ class HelpWidget(QWidget):
                 pass
         self.ui.backgroundLabel.hide()
         self.frames_sprayed = 0
+        self.frames_elapsed = 0
+        self._frame_clock = QElapsedTimer()
 
         # --- 创建并设置遮罩层 ---
         self.overlay = ConfettiOverlay(self)
 
         self.animation_timer = QTimer(self)
+        self.animation_timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.animation_timer.timeout.connect(self.update_animation)
 
     def closeEvent(self, event):
@@ -232,7 +274,7 @@ class HelpWidget(QWidget):
                 except Exception:
                     pass
             try:
-                self.particles = []
+                self.confetti.clear()
             except Exception:
                 pass
             try:
@@ -255,9 +297,11 @@ class HelpWidget(QWidget):
     def showEvent(self, event):
         """窗口显示时，重置并启动彩带动画"""
         super().showEvent(event)
-        self.particles = []
+        self.confetti.clear()
         self.frames_sprayed = 0
-        self.animation_timer.start(16)
+        self.frames_elapsed = 0
+        self._frame_clock.start()
+        self.animation_timer.start(self.FRAME_INTERVAL_MS)
 
     def resizeEvent(self, event):
         """窗口大小改变时，确保遮罩层也同步改变大小"""
@@ -269,18 +313,15 @@ class HelpWidget(QWidget):
     def init_confetti_animation(self):
         """初始化并启动彩带动画"""
         self.animation_timer = QTimer(self)
+        self.animation_timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.animation_timer.timeout.connect(self.update_animation)
-        self.animation_timer.start(16)
+        self.frames_elapsed = 0
+        self._frame_clock.start()
+        self.animation_timer.start(self.FRAME_INTERVAL_MS)
 
     def create_confetti_burst(self, count, origin, from_left=True):
         """在指定位置创建一波彩带"""
-        colors = [
-            QColor("#f44336"), QColor("#e91e63"), QColor("#9c27b0"),
-            QColor("#673ab7"), QColor("#3f51b5"), QColor("#2196f3"),
-            QColor("#03a9f4"), QColor("#00bcd4"), QColor("#009688"),
-            QColor("#4caf50"), QColor("#8bc34a"), QColor("#cddc39"),
-            QColor("#ffeb3b"), QColor("#ffc107"), QColor("#ff9800")
-        ]
+        origin_x, origin_y = origin
         for _ in range(count):
             angle = random.uniform(-110, -10)
             if not from_left:
@@ -288,37 +329,31 @@ class HelpWidget(QWidget):
             speed = random.uniform(5.0, 9.0)
             vx = speed * math.cos(math.radians(angle))
             vy = speed * math.sin(math.radians(angle))
-            color = random.choice(colors)
-            size = QSizeF(random.uniform(5, 10), random.uniform(8, 15))
+            color_index = random.randrange(len(CONFETTI_COLORS))
+            width = random.uniform(5, 10)
+            height = random.uniform(8, 15)
             angular_velocity = random.uniform(-5, 5)
-            particle = ConfettiParticle(
-                pos=QPointF(origin),
-                velocity=QPointF(vx, vy),
-                color=color,
-                size=size,
-                angular_velocity=angular_velocity
-            )
-            self.particles.append(particle)
+            self.confetti.spawn(origin_x, origin_y, vx, vy, width, height,
+                                random.uniform(0, 360), angular_velocity, color_index)
 
     def update_animation(self):
-        """更新粒子状态"""
-        if self.frames_sprayed < self.SPRAY_DURATION_FRAMES:
-            self.create_confetti_burst(self.PARTICLES_PER_FRAME_PER_SIDE, QPointF(20, self.height() - 10), from_left=True)
-            self.create_confetti_burst(self.PARTICLES_PER_FRAME_PER_SIDE, QPointF(self.width() - 20, self.height() - 10), from_left=False)
-            self.frames_sprayed += 1
-
-        if self.frames_sprayed >= self.SPRAY_DURATION_FRAMES and not self.particles:
-            self.animation_timer.stop()
+        """按实际经过的时间推进粒子状态，定时器抖动或偶发卡顿不会改变动画速度"""
+        target_frames = self._frame_clock.elapsed() // self.FRAME_INTERVAL_MS
+        frames = min(target_frames - self.frames_elapsed, self.MAX_FRAMES_PER_TICK)
+        self.frames_elapsed = target_frames
+        if frames <= 0:
             return
 
-        for particle in self.particles[:]:
-            particle.velocity += self.GRAVITY
-            particle.velocity *= self.DRAG
-            particle.pos += particle.velocity
-            particle.angle += particle.angular_velocity
-            particle.life -= self.FADE_SPEED
-            if particle.life <= 0 or particle.pos.y() > self.height() + 20:
-                self.particles.remove(particle)
+        max_y = self.height() + 20
+        for _ in range(frames):
+            if self.frames_sprayed < self.SPRAY_DURATION_FRAMES:
+                self.create_confetti_burst(self.PARTICLES_PER_FRAME_PER_SIDE, (20, self.height() - 10), from_left=True)
+                self.create_confetti_burst(self.PARTICLES_PER_FRAME_PER_SIDE, (self.width() - 20, self.height() - 10), from_left=False)
+                self.frames_sprayed += 1
+            self.confetti.step(self.GRAVITY, self.DRAG, self.FADE_SPEED, max_y)
+
+        if self.frames_sprayed >= self.SPRAY_DURATION_FRAMES and not self.confetti.count:
+            self.animation_timer.stop()
 
         self.overlay.update()
 
@@ -1,12 +1,18 @@
-from time import sleep
+import functools
+import time
 import requests
 import os, sys
 import tempfile
 
-from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
-from tenacity import retry, retry_if_exception_type, wait_fixed
-from utils.auxiliary_util import re_search, get_timestamp
+from tenacity import Retrying, retry_if_exception_type, wait_fixed
+from utils.auxiliary_util import re_search, get_timestamp, log_output, SportsUploaderError
+from utils.cancellation import as_cancel_token, run_cancellable
+from utils.metrics import NULL_METRICS
+from src.api_client import create_session
+
+# 登录相关请求的超时时间（秒）
+LOGIN_REQUEST_TIMEOUT_SECONDS = 10
 
 def get_jalogin_from_authorize(session, client_id, redirect_uri, scope="profile", state="8"):
     """
@@ -21,7 +27,7 @@ def get_jalogin_from_authorize(session, client_id, redirect_uri, scope="profile"
         "redirect_uri": redirect_uri,
     }
     # 发起请求并允许重定向；session 会保存 cookies
-    r = session.get(authorize_url, params=params, allow_redirects=True, timeout=10)
+    r = session.get(authorize_url, params=params, allow_redirects=True, timeout=LOGIN_REQUEST_TIMEOUT_SECONDS)
 
     # 优先在重定向历史中寻找 jalogin
     for resp in (r.history + [r]):
@@ -36,24 +42,44 @@ def get_jalogin_from_authorize(session, client_id, redirect_uri, scope="profile"
     raise RuntimeError("未能从 authorize 的重定向/页面中获取 jalogin URL")
 
 # 创建一个新的 session
+# 关闭该 session 会中断其上正在进行的请求，用于取消登录
 def _create_session():
-    session = requests.Session()
+    session = create_session(max_retries=3)
     session.headers = {'Referer':'https://jaccount.sjtu.edu.cn'}
-    session.mount('http://', HTTPAdapter(max_retries=3))
-    session.mount('https://', HTTPAdapter(max_retries=3))
     return session
 
+def _retry_on_request_error(func):
+    """
+    网络错误时每 3 秒重试一次。
+    被装饰函数的第一个参数为 session，另外接受 cancel_token 关键字参数：传入时请求本身和重试等待都可被取消，
+    取消时关闭 session 以中断进行中的请求，并抛出 OperationCancelled（SportsUploaderError 的子类）。
+    另接受 metrics 关键字参数，每次重试记录一条 retry 计数（标签 stage 为函数名）。
+    """
+    @functools.wraps(func)
+    def wrapper(session, *args, cancel_token=None, metrics=NULL_METRICS, **kwargs):
+        retrying = Retrying(
+            retry=retry_if_exception_type(RequestException),
+            wait=wait_fixed(3),
+            sleep=cancel_token.sleep if cancel_token is not None else time.sleep,
+            before_sleep=lambda retry_state: metrics.count("retry", stage=func.__name__),
+            reraise=True,
+        )
+        for attempt in retrying:
+            with attempt:
+                return run_cancellable(lambda: func(session, *args, **kwargs), cancel_token, on_cancel=session.close)
+    return wrapper
+
 # 获得登录界面网页(html)，便于之后从中提取必要信息
-@retry(retry=retry_if_exception_type(RequestException), wait=wait_fixed(3))
+@_retry_on_request_error
 def _get_login_page(session, url):
-    req = session.get(url)
+    req = session.get(url, timeout=LOGIN_REQUEST_TIMEOUT_SECONDS)
     return req.text
 
 # 获得验证码图片(jpeg)
-@retry(retry=retry_if_exception_type(RequestException), wait=wait_fixed(3))
+@_retry_on_request_error
 def _get_captcha(session, captcha_url):
-    session.get(captcha_url)
-    captcha_jpeg = session.get(captcha_url)
+    session.get(captcha_url, timeout=LOGIN_REQUEST_TIMEOUT_SECONDS)
+    captcha_jpeg = session.get(captcha_url, timeout=LOGIN_REQUEST_TIMEOUT_SECONDS)
     image_file = tempfile.NamedTemporaryFile(delete=False, suffix=".jpeg")
     image_path = image_file.name
     image_file.close()
@@ -69,7 +95,7 @@ def _indentify_captcha(image_path):
     try:
         with open(image_path, "rb") as f:
             files = {"image": ("captcha.jpg", f, "image/jpeg")}
-            response = requests.post(captcha_solver_url, files=files)
+            response = requests.post(captcha_solver_url, files=files, timeout=LOGIN_REQUEST_TIMEOUT_SECONDS)
 
         result = response.json().get("result")
         if not result:
@@ -81,7 +107,7 @@ def _indentify_captcha(image_path):
         except FileNotFoundError:
             pass
 
-@retry(retry=retry_if_exception_type(RequestException), wait=wait_fixed(3))
+@_retry_on_request_error
 def _post_login_request(session, login_page, username, password, captcha_code):
     # 从页面中获得其他必要参数
     sid = re_search(r'sid: "(.*?)"', login_page)
@@ -96,7 +122,7 @@ def _post_login_request(session, login_page, username, password, captcha_code):
 
     # 发起 post 请求
     session.post(
-        'https://jaccount.sjtu.edu.cn/jaccount/ulogin', data = data)
+        'https://jaccount.sjtu.edu.cn/jaccount/ulogin', data = data, timeout=LOGIN_REQUEST_TIMEOUT_SECONDS)
 
 
     # 登录成功会在 cookies 中获得 JAAuthCookie
@@ -106,33 +132,45 @@ def _post_login_request(session, login_page, username, password, captcha_code):
     else:
         return -1
 
-def login(username, password):
+def login(username, password, log_cb=None, stop_check_cb=None, metrics=NULL_METRICS):
+        """
+        使用 Jaccount 登录并返回携带登录 cookies 的 session。
+        stop_check_cb: 函数或 CancellationToken，返回True表示请求停止；网络请求、重试等待与各步骤之间均可被中断，
+        停止时抛出 OperationCancelled（SportsUploaderError 的子类）。
+        登录未成功时抛出 SportsUploaderError。
+        metrics: utils.metrics 中的记录器，记录网络错误引起的重试次数
+        """
+        cancel_token = as_cancel_token(stop_check_cb)
         session = _create_session()
 
-        url = get_jalogin_from_authorize(
+        log_output("正在获取 Jaccount 登录页面...", callback=log_cb)
+        url = run_cancellable(lambda: get_jalogin_from_authorize(
             session,
             client_id="9mqzULSXYgUYj5fPOpyL",
             redirect_uri="https://pe.sjtu.edu.cn/oauth2Login"
-        )
+        ), cancel_token, on_cancel=session.close)
 
         # 获得页面信息
-        login_page = _get_login_page(session, url)
+        login_page = _get_login_page(session, url, cancel_token=cancel_token, metrics=metrics)
 
         # 立刻获得验证码请求路径，避免时间戳过期
         captcha_id = re_search(r'img.src = \'captcha\?(.*)\'', login_page) + get_timestamp() # type: ignore
         captcha_url = 'https://jaccount.sjtu.edu.cn/jaccount/captcha?' + captcha_id
 
         # 下载验证码图片
-        image_path = _get_captcha(session, captcha_url)
-        captcha_code = _indentify_captcha(image_path)
+        log_output("正在识别验证码...", callback=log_cb)
+        image_path = _get_captcha(session, captcha_url, cancel_token=cancel_token, metrics=metrics)
+        captcha_code = run_cancellable(lambda: _indentify_captcha(image_path), cancel_token)
 
         # 获取用户名和密码
-        sleep(1)
+        cancel_token.sleep(1)
         user_info = [username, password]
 
         # 发起登录请求
-        result = _post_login_request(session, login_page, user_info[0],user_info[1], captcha_code)
+        log_output("正在提交登录请求...", callback=log_cb)
+        result = _post_login_request(session, login_page, user_info[0],user_info[1], captcha_code, cancel_token=cancel_token, metrics=metrics)
 
         # 判断返回结果
         if result == 0:
             return session
+        raise SportsUploaderError("登录失败，请检查用户名和密码，或稍后重试。")
@@ -1,17 +1,96 @@
 import time
 import datetime
+import queue
 import random
+import threading
 from src.api_client import get_authorization_token_and_rules, upload_running_data
 from src.data_generator import generate_running_data_payload
-from src.config import load_config
+from src.payload_encoder import iter_payload_json
+from src.config import load_run_settings
+from src.channels import PHASE_AUTH, PHASE_GENERATE, PHASE_UPLOAD, PHASE_DONE, PHASE_SKIPPED
 from utils.auxiliary_util import log_output, SportsUploaderError, get_current_epoch_ms
+from utils.cancellation import CANCEL_POLL_INTERVAL
+from utils.metrics import NULL_METRICS
 
-def run_sports_upload(config, progress_callback=None, log_cb=None, stop_check_cb=None):
+# 上传阶段最多提前准备好的数据条数（不含正在生成的一条）
+PREFETCH_DEPTH = 1
+
+
+class _PayloadProducer:
+    """
+    上传阶段的后台生成线程：按 start_times 的顺序逐条生成跑步数据并预先编码请求体，放入长度为 PREFETCH_DEPTH 的队列。
+    主线程上传当前一条时，下一条已在后台准备，每条耗时接近 max(生成, 网络) 而不是两者之和；
+    请求仍由主线程逐条按原顺序发送。
+    """
+
+    def __init__(self, config, start_times, required_signpoints, settings, log_cb=None, stop_check_cb=None, metrics=NULL_METRICS):
+        self._config = config
+        self._start_times = start_times
+        self._required_signpoints = required_signpoints
+        self._settings = settings
+        self._log_cb = log_cb
+        self._stop_check_cb = stop_check_cb
+        self._metrics = metrics
+        self._queue = queue.Queue(maxsize=PREFETCH_DEPTH)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="PayloadProducer", daemon=True)
+        self._thread.start()
+
+    def get(self):
+        """按顺序取出下一条 (载荷, 请求体块列表)；该条生成失败时抛出生成时的异常。"""
+        payload, body_chunks, error = self._queue.get()
+        if error is not None:
+            raise error
+        return payload, body_chunks
+
+    def close(self):
+        """停止后台线程，不等待正在进行的生成结束。"""
+        self._closed.set()
+
+    def _run(self):
+        total_runs = len(self._start_times)
+        for idx, start_dt in enumerate(self._start_times, start=1):
+            if self._closed.is_set():
+                return
+            # 每条数据使用独立的配置副本设置开始时间（毫秒），不与主线程共享可变状态
+            run_config = dict(self._config, START_TIME_EPOCH_MS=int(start_dt.timestamp() * 1000))
+            run_metrics = self._metrics.bind(run=idx)
+            try:
+                log_output(f"开始生成第{idx}/{total_runs}条跑步数据，开始时间: {start_dt}", callback=self._log_cb)
+                with run_metrics.timer("generate"):
+                    payload, _, _ = generate_running_data_payload(
+                        run_config,
+                        self._required_signpoints,
+                        {},
+                        log_cb=self._log_cb,
+                        stop_check_cb=self._stop_check_cb,
+                        settings=self._settings
+                    )
+                with run_metrics.timer("serialize"):
+                    body_chunks = list(iter_payload_json(payload))
+                item = (payload, body_chunks, None)
+            except Exception as e:
+                item = (None, None, e)
+            self._put(item)
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=CANCEL_POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+
+def run_sports_upload(config, progress_callback=None, log_cb=None, stop_check_cb=None, settings=None, metrics=NULL_METRICS):
     """
     核心的跑步数据生成和上传逻辑，接收配置字典和进度回调函数。
-    progress_callback: 接收 (current_value, max_value, message)
+    progress_callback: 接收 (current_value, max_value, message, phase)，phase 为 src.channels 中的 PHASE_* 常量
     log_cb: 接收 (message, level)
-    stop_check_cb: 一个函数，调用时返回True表示请求停止
+    stop_check_cb: 一个函数或 utils.cancellation.CancellationToken，调用时返回True表示请求停止；阻塞中的网络请求会随之中断
+    settings: 本次任务的 RunSettings，未提供时从磁盘加载
+    metrics: utils.metrics 中的记录器，记录 auth、generate、upload、http、serialize 计时与 bytes_sent、upload_result 计数；
+             每条数据的记录带 run 标签（从 1 开始）。默认不记录
     """
 
     if stop_check_cb and stop_check_cb():
@@ -21,16 +100,25 @@ def run_sports_upload(config, progress_callback=None, log_cb=None, stop_check_cb
     auth_token_for_upload = None
     required_signpoints = []
 
+    # 整个任务只加载并校验一次配置，并传递给每次数据生成
+    if settings is None:
+        try:
+            settings = load_run_settings()
+        except ValueError as e:
+            log_output(f"配置错误: {e}", "error", log_cb)
+            return False, f"配置错误: {e}"
+
     try:
         log_output("步骤 1/3: 获取认证信息...", callback=log_cb)
-        if progress_callback: progress_callback(10, 100, "获取认证信息和跑步规则...")
+        if progress_callback: progress_callback(10, 100, "获取认证信息和跑步规则...", PHASE_AUTH)
 
         if stop_check_cb and stop_check_cb():
             log_output("任务被请求停止，正在退出...", "warning", log_cb)
             return False, "任务已停止。"
 
         # 获取认证令牌
-        auth_token_for_upload, _ = get_authorization_token_and_rules(config, log_cb=log_cb, stop_check_cb=stop_check_cb)
+        with metrics.timer("auth"):
+            auth_token_for_upload, _ = get_authorization_token_and_rules(config, log_cb=log_cb, stop_check_cb=stop_check_cb, metrics=metrics)
 
     except SportsUploaderError as e:
         # 将错误返回给上层（UI/线程）处理并记录，避免重复打印同一错误
@@ -43,18 +131,20 @@ def run_sports_upload(config, progress_callback=None, log_cb=None, stop_check_cb
         return False, "任务已停止。"
 
     log_output("\n步骤 2/3: 生成跑步数据...", callback=log_cb)
-    if progress_callback: progress_callback(40, 100, "生成跑步数据...")
+    if progress_callback: progress_callback(40, 100, "生成跑步数据...", PHASE_GENERATE)
     running_data_payload = None
     total_dist = 0
     total_dur = 0
     try:
-        running_data_payload, total_dist, total_dur = generate_running_data_payload(
-            config,
-            required_signpoints,
-            {},
-            log_cb=log_cb,
-            stop_check_cb=stop_check_cb
-        )
+        with metrics.timer("generate"):
+            running_data_payload, total_dist, total_dur = generate_running_data_payload(
+                config,
+                required_signpoints,
+                {},
+                log_cb=log_cb,
+                stop_check_cb=stop_check_cb,
+                settings=settings
+            )
 
     except SportsUploaderError as e:
         log_output(f"生成跑步数据失败: {e}", "error", log_cb)
@@ -71,16 +161,15 @@ def run_sports_upload(config, progress_callback=None, log_cb=None, stop_check_cb
         # 生成并上传多次数据
         log_output("\n步骤 3/3: 上传跑步数据...", callback=log_cb)
         
-        # 从配置文件读取参数
-        app_config = load_config()
-        use_specific_dates = app_config.get("指定日期模式", False)
-        specific_dates = app_config.get("指定日期列表", [])
-        total_runs = app_config.get("跑步天数", 25)
-        use_random_time = app_config.get("跑步时间随机", False)
-        fixed_hour = app_config.get("固定跑步时间_时", 8)
-        fixed_minute = app_config.get("固定跑步时间_分", 0)
-        random_start_hour = app_config.get("随机时间范围_开始时", 7)
-        random_end_hour = app_config.get("随机时间范围_结束时", 20)
+        # 从配置读取参数
+        use_specific_dates = settings.use_specific_dates
+        specific_dates = settings.specific_dates
+        total_runs = settings.run_days
+        use_random_time = settings.use_random_time
+        fixed_hour = settings.fixed_hour
+        fixed_minute = settings.fixed_minute
+        random_start_hour = settings.random_start_hour
+        random_end_hour = settings.random_end_hour
         
         success_count = 0
         fail_count = 0
@@ -120,71 +209,80 @@ def run_sports_upload(config, progress_callback=None, log_cb=None, stop_check_cb
                     start_dt = day.replace(hour=fixed_hour, minute=fixed_minute, second=0, microsecond=0)
                 start_times.append(start_dt)
 
-        for idx, start_dt in enumerate(start_times, start=1):
-            if stop_check_cb and stop_check_cb():
-                log_output("任务被请求停止，正在退出...", "warning", log_cb)
-                return False, "任务已停止。"
-
-            # 设置本次发送的开始时间（毫秒）
-            config["START_TIME_EPOCH_MS"] = int(start_dt.timestamp() * 1000)
+        if progress_callback: progress_callback(0, total_runs, f"已完成0/{total_runs}", PHASE_UPLOAD)
+        # 后台线程按顺序提前生成并编码下一条数据，上传与生成同时进行
+        producer = _PayloadProducer(config, start_times, required_signpoints, settings,
+                                    log_cb=log_cb, stop_check_cb=stop_check_cb, metrics=metrics)
+        try:
+            for idx in range(1, len(start_times) + 1):
+                if stop_check_cb and stop_check_cb():
+                    log_output("任务被请求停止，正在退出...", "warning", log_cb)
+                    return False, "任务已停止。"
 
-            try:
-                log_output(f"开始生成第{idx}/{total_runs}条跑步数据，开始时间: {start_dt}", callback=log_cb)
-                running_data_payload, total_dist, total_dur = generate_running_data_payload(
-                    config,
-                    required_signpoints,
-                    {},
-                    log_cb=log_cb,
-                    stop_check_cb=stop_check_cb
-                )
-            except SportsUploaderError as e:
-                log_output(f"生成跑步数据失败（第{idx}/{total_runs}条）: {e}", "error", log_cb)
-                fail_count += 1
-                # 更新已完成计数并继续
-                log_output(f"已完成{idx}/{total_runs}", "info", log_cb)
-                if progress_callback: progress_callback(idx, total_runs, f"已完成{idx}/{total_runs}")
-                continue
-            except Exception as e:
-                log_output(f"未知错误（生成第{idx}/{total_runs}条）: {e}", "error", log_cb)
-                fail_count += 1
-                log_output(f"已完成{idx}/{total_runs}", "info", log_cb)
-                if progress_callback: progress_callback(idx, total_runs, f"已完成{idx}/{total_runs}")
-                continue
+                run_metrics = metrics.bind(run=idx)
 
-            try:
-                log_output(f"尝试上传第{idx}/{total_runs}条跑步数据...", callback=log_cb)
-                response = upload_running_data(
-                    config,
-                    auth_token_for_upload,
-                    running_data_payload,
-                    log_cb=log_cb,
-                    stop_check_cb=stop_check_cb
-                )
-
-                if response.get('code') == 0 and response.get('data'):
-                    log_output(f"第{idx}/{total_runs}条上传成功", "success", log_cb)
-                    success_count += 1
-                else:
-                    # 出现任何非成功情况均记录为失败但继续下一条
-                    log_output(f"第{idx}/{total_runs}条上传未成功，响应: {response}", "warning", log_cb)
+                try:
+                    # 生成失败的异常在这里重新抛出，按原顺序计入失败
+                    running_data_payload, body_chunks = producer.get()
+                except SportsUploaderError as e:
+                    log_output(f"生成跑步数据失败（第{idx}/{total_runs}条）: {e}", "error", log_cb)
+                    fail_count += 1
+                    run_metrics.count("upload_result", outcome="generate_failed")
+                    # 更新已完成计数并继续
+                    log_output(f"已完成{idx}/{total_runs}", "info", log_cb)
+                    if progress_callback: progress_callback(idx, total_runs, f"已完成{idx}/{total_runs}", PHASE_UPLOAD)
+                    continue
+                except Exception as e:
+                    log_output(f"未知错误（生成第{idx}/{total_runs}条）: {e}", "error", log_cb)
                     fail_count += 1
+                    run_metrics.count("upload_result", outcome="generate_failed")
+                    log_output(f"已完成{idx}/{total_runs}", "info", log_cb)
+                    if progress_callback: progress_callback(idx, total_runs, f"已完成{idx}/{total_runs}", PHASE_UPLOAD)
+                    continue
 
-            except SportsUploaderError as e:
-                log_output(f"上传失败（第{idx}/{total_runs}条）: {e}", "error", log_cb)
-                fail_count += 1
-            except Exception as e:
-                log_output(f"未知错误（上传第{idx}/{total_runs}条）: {e}", "error", log_cb)
-                fail_count += 1
+                try:
+                    log_output(f"尝试上传第{idx}/{total_runs}条跑步数据...", callback=log_cb)
+                    with run_metrics.timer("upload"):
+                        response = upload_running_data(
+                            config,
+                            auth_token_for_upload,
+                            running_data_payload,
+                            log_cb=log_cb,
+                            stop_check_cb=stop_check_cb,
+                            metrics=run_metrics,
+                            body_chunks=body_chunks
+                        )
+
+                    if response.get('code') == 0 and response.get('data'):
+                        log_output(f"第{idx}/{total_runs}条上传成功", "success", log_cb)
+                        success_count += 1
+                        run_metrics.count("upload_result", outcome="success")
+                    else:
+                        # 出现任何非成功情况均记录为失败但继续下一条
+                        log_output(f"第{idx}/{total_runs}条上传未成功，响应: {response}", "warning", log_cb)
+                        fail_count += 1
+                        run_metrics.count("upload_result", outcome="rejected")
 
-            log_output(f"已完成{idx}/{total_runs}", "info", log_cb)
-            if progress_callback: progress_callback(idx, total_runs, f"已完成{idx}/{total_runs}")
+                except SportsUploaderError as e:
+                    log_output(f"上传失败（第{idx}/{total_runs}条）: {e}", "error", log_cb)
+                    fail_count += 1
+                    run_metrics.count("upload_result", outcome="error")
+                except Exception as e:
+                    log_output(f"未知错误（上传第{idx}/{total_runs}条）: {e}", "error", log_cb)
+                    fail_count += 1
+                    run_metrics.count("upload_result", outcome="error")
+
+                log_output(f"已完成{idx}/{total_runs}", "info", log_cb)
+                if progress_callback: progress_callback(idx, total_runs, f"已完成{idx}/{total_runs}", PHASE_UPLOAD)
+        finally:
+            producer.close()
 
         # 所有条目处理完成
         final_msg = f"完成: {success_count}/{total_runs} 成功，{fail_count}/{total_runs} 失败"
         log_output(final_msg, callback=log_cb)
-        if progress_callback: progress_callback(total_runs, total_runs, "已完成")
+        if progress_callback: progress_callback(total_runs, total_runs, "已完成", PHASE_DONE)
         return True, final_msg
     else:
         log_output("数据生成或认证失败，上传被跳过。", "error", log_cb)
-        if progress_callback: progress_callback(100, 100, "上传被跳过！")
+        if progress_callback: progress_callback(100, 100, "上传被跳过！", PHASE_SKIPPED)
         return False, "数据生成或认证失败，上传被跳过。"
\ No newline at end of file
@@ -0,0 +1,83 @@
+import json
+from src.track import TrackPoints, TrackSegment
+
+# 每个输出块的目标大小（字节）
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def iter_payload_json(payload, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    将上传载荷流式编码为 JSON，按块产出 bytes。
+    输出与 json.dumps(payload, default=track_json_default) 逐字节一致，但轨迹点直接
+    从 TrackPoints 的列数据格式化，不会生成点字典，也不会拼出完整的大字符串。
+    可直接作为 requests 的 data 参数，以 chunked 方式发送。
+    """
+    parts = []
+    size = 0
+    for text in _iter_json(payload):
+        parts.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            yield "".join(parts).encode("utf-8")
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+def encode_payload(payload):
+    """将上传载荷完整编码为 bytes。"""
+    return b"".join(iter_payload_json(payload))
+
+
+def _iter_json(obj):
+    if isinstance(obj, dict):
+        if not obj:
+            yield "{}"
+            return
+        yield "{"
+        first = True
+        for key, value in obj.items():
+            yield f"{json.dumps(key)}: " if first else f", {json.dumps(key)}: "
+            first = False
+            yield from _iter_json(value)
+        yield "}"
+    elif isinstance(obj, (list, tuple)):
+        if not obj:
+            yield "[]"
+            return
+        yield "["
+        first = True
+        for item in obj:
+            if not first:
+                yield ", "
+            first = False
+            yield from _iter_json(item)
+        yield "]"
+    elif isinstance(obj, TrackSegment):
+        yield from _iter_track_points(obj.track, obj.start, obj.stop)
+    elif isinstance(obj, TrackPoints):
+        yield from _iter_track_points(obj, 0, len(obj))
+    else:
+        yield json.dumps(obj)
+
+
+def _iter_track_points(track, start, stop):
+    """直接由列数据产出轨迹点数组的 JSON 文本，格式与点字典经 json.dumps 后相同。"""
+    if start == stop:
+        yield "[]"
+        return
+
+    latitudes = track.latitudes
+    longitudes = track.longitudes
+    locatetimes = track.locatetimes
+    locations = track.locations(start, stop)
+
+    yield "["
+    for index, location in zip(range(start, stop), locations):
+        separator = "" if index == start else ", "
+        yield (
+            f'{separator}{{"latLng": {{"latitude": {latitudes[index]!r}, "longitude": {longitudes[index]!r}}}, '
+            f'"location": "{location}", "step": 0, "locatetime": {locatetimes[index]}}}'
+        )
+    yield "]"
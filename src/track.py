@@ -0,0 +1,119 @@
+from array import array
+from utils.auxiliary_util import TRACK_POINT_DECIMAL_PLACES, cumulative_distances, format_locations
+
+
+class TrackPoints:
+    """
+    按列存储的轨迹点容器。
+    纬度、经度（已按 TRACK_POINT_DECIMAL_PLACES 取整）与 locatetime 分别保存在
+    array('d') / array('q') 中，每个点仅占 24 字节；请求体所需的点字典只在序列化时生成。
+    """
+    __slots__ = ("latitudes", "longitudes", "locatetimes", "_cumulative_distances")
+
+    def __init__(self, latitudes=(), longitudes=(), locatetimes=()):
+        self.latitudes = array('d', latitudes)
+        self.longitudes = array('d', longitudes)
+        self.locatetimes = array('q', locatetimes)
+        if not (len(self.latitudes) == len(self.longitudes) == len(self.locatetimes)):
+            raise ValueError("轨迹点各列长度不一致")
+        self._cumulative_distances = None
+
+    def __len__(self):
+        return len(self.locatetimes)
+
+    def __iter__(self):
+        return self.iter_points(0, len(self))
+
+    def __getitem__(self, index):
+        return self.point(range(len(self))[index])
+
+    def append(self, latitude, longitude, locatetime):
+        self.latitudes.append(latitude)
+        self.longitudes.append(longitude)
+        self.locatetimes.append(locatetime)
+        self._cumulative_distances = None
+
+    def location(self, index):
+        """返回 "经度,纬度" 形式的 location 字符串。"""
+        return f"{self.longitudes[index]:.{TRACK_POINT_DECIMAL_PLACES}f},{self.latitudes[index]:.{TRACK_POINT_DECIMAL_PLACES}f}"
+
+    def locations(self, start, stop):
+        """批量返回 [start, stop) 区间内各点的 location 字符串。"""
+        return format_locations(memoryview(self.longitudes)[start:stop], memoryview(self.latitudes)[start:stop])
+
+    def point(self, index):
+        """将第 index 个点还原为请求体中的轨迹点字典。"""
+        return {
+            "latLng": {"latitude": self.latitudes[index], "longitude": self.longitudes[index]},
+            "location": self.location(index),
+            "step": 0,
+            "locatetime": self.locatetimes[index]
+        }
+
+    def iter_points(self, start, stop):
+        for index in range(start, stop):
+            yield self.point(index)
+
+    def cumulative_distances(self):
+        """
+        返回累计距离前缀索引：第 i 项为第 0 个点沿轨迹到第 i 个点的距离（米）。
+        索引只在首次调用时整体计算一次，之后任意区间 [i, j] 的距离均为 O(1) 的差值。
+        """
+        if self._cumulative_distances is None:
+            self._cumulative_distances = cumulative_distances(self.latitudes, self.longitudes)
+        return self._cumulative_distances
+
+    def distance_between(self, first, last):
+        """返回第 first 个点沿轨迹到第 last 个点（含）的距离。"""
+        cumulative = self.cumulative_distances()
+        return cumulative[last] - cumulative[first]
+
+    def segment(self, start, stop):
+        """返回 [start, stop) 区间的零拷贝视图。"""
+        return TrackSegment(self, start, stop)
+
+
+class TrackSegment:
+    """TrackPoints 中一段连续轨迹点的视图，仅保存索引区间，不复制数据。"""
+    __slots__ = ("track", "start", "stop")
+
+    def __init__(self, track, start, stop):
+        if not 0 <= start <= stop <= len(track):
+            raise IndexError(f"轨迹段区间越界: [{start}, {stop})")
+        self.track = track
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __iter__(self):
+        return self.track.iter_points(self.start, self.stop)
+
+    def __getitem__(self, index):
+        return self.track.point(range(self.start, self.stop)[index])
+
+    @property
+    def first_locatetime(self):
+        return self.track.locatetimes[self.start]
+
+    @property
+    def last_locatetime(self):
+        return self.track.locatetimes[self.stop - 1]
+
+    @property
+    def distance(self):
+        """该段内相邻点之间的距离之和（米）。"""
+        if self.stop - self.start < 2:
+            return 0
+        return self.track.distance_between(self.start, self.stop - 1)
+
+    def to_list(self):
+        return list(self)
+
+
+def track_json_default(obj):
+    """供 json.dumps(default=...) 使用，在序列化时将轨迹容器展开为点字典列表。"""
+    if isinstance(obj, (TrackPoints, TrackSegment)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,198 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from src.config import DEFAULT_CONFIG, RunSettings
+
+# 与正式服务相同的接口路径
+UID_PATH = "/sports/my/uid"
+MY_DATA_PATH = "/sports/my/data"
+POINT_RULE_PATH = "/api/running/point-rule"
+UPLOAD_PATH = "/api/running/result/upload"
+
+FAKE_AUTH_TOKEN = "fake-uid-token"
+
+RecordedRequest = namedtuple("RecordedRequest", "method path query headers body")
+
+# 停止请求的最大允许响应延迟（秒）
+MAX_STOP_LATENCY = 0.5
+
+
+def fixed_run_settings(runs=3):
+    """测试用的 RunSettings：固定距离与配速，共 runs 条数据。"""
+    return RunSettings.from_mapping(dict(DEFAULT_CONFIG, **{
+        "参数随机": False,
+        "跑步天数": runs,
+        "每日距离_米": 1000,
+        "配速_分钟每公里": 5.0,
+    }))
+
+
+def wait_for_helper_threads(timeout, name="cancellable-call"):
+    """等待 run_cancellable 的辅助线程全部结束，超时仍有存活线程时返回 False。"""
+    deadline = time.monotonic() + timeout
+    while any(thread.name == name for thread in threading.enumerate()):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _default_responses():
+    return {
+        UID_PATH: {"code": 0, "data": {"uid": FAKE_AUTH_TOKEN}},
+        MY_DATA_PATH: {"code": 0, "data": {}},
+        POINT_RULE_PATH: {"code": 0, "data": {"rules": {"id": 6, "spmin": 180, "spmax": 540}}},
+        UPLOAD_PATH: {"code": 0, "data": True},
+    }
+
+
+class FakeSportsServer:
+    """
+    进程内的体育服务替身，提供 UID、MY_DATA、POINT_RULE 与 UPLOAD 四个接口，用于离线端到端测试。
+    可按路径注入固定延迟、HTTP 错误以及不响应（模拟超时），并记录收到的所有请求。
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.responses = _default_responses()
+        self.requests = []
+        self._path_latency = {}
+        self._faults = defaultdict(deque)
+        self._lock = threading.Lock()
+        self._release = threading.Event()
+        self._server = None
+
+    # --- 生命周期 ---
+    def start(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeSportsHandler)
+        server.daemon_threads = True
+        server.fake = self
+        server.handle_error = lambda request, client_address: None
+        self._server = server
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05},
+                         name="fake-sports-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        # 先放行被挂起的请求，再关闭服务
+        self._release.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def client_config(self, **overrides):
+        """返回指向本服务的 run_sports_upload 运行时配置。"""
+        config = {
+            "USER_ID": "tester",
+            "COOKIE": "",
+            "START_LATITUDE": 31.031599,
+            "START_LONGITUDE": 121.442938,
+            "END_LATITUDE": 31.0264,
+            "END_LONGITUDE": 121.4551,
+            "RUNNING_SPEED_MPS": round(1000.0 / (3.5 * 60), 3),
+            "INTERVAL_SECONDS": 3,
+            "HOST": urlsplit(self.base_url).netloc,
+            "UID_URL": self.base_url + UID_PATH,
+            "MY_DATA_URL": self.base_url + MY_DATA_PATH,
+            "POINT_RULE_URL": self.base_url + POINT_RULE_PATH,
+            "UPLOAD_URL": self.base_url + UPLOAD_PATH,
+        }
+        config.update(overrides)
+        return config
+
+    # --- 故障注入 ---
+    def set_latency(self, path, seconds):
+        """该路径的每个请求在响应前等待 seconds 秒（叠加在全局 latency 之上）。"""
+        self._path_latency[path] = seconds
+
+    def inject_error(self, path, status=500, times=1):
+        """该路径接下来的 times 个请求返回 HTTP 错误。"""
+        with self._lock:
+            self._faults[path].extend([("error", status)] * times)
+
+    def inject_timeout(self, path, times=1):
+        """该路径接下来的 times 个请求不返回响应，直到服务停止。"""
+        with self._lock:
+            self._faults[path].extend([("hang", None)] * times)
+
+    # --- 记录 ---
+    def requests_to(self, path):
+        with self._lock:
+            return [request for request in self.requests if request.path == path]
+
+    @property
+    def uploads(self):
+        """已收到的上传请求体（解析后的 JSON）。"""
+        return [json.loads(request.body) for request in self.requests_to(UPLOAD_PATH)]
+
+    def _handle(self, method, raw_path, headers, body):
+        """返回 (状态码, 响应对象)；状态码为 None 表示请求被挂起，不返回任何响应。"""
+        parts = urlsplit(raw_path)
+        with self._lock:
+            self.requests.append(RecordedRequest(method, parts.path, parts.query, headers, body))
+            fault = self._faults[parts.path].popleft() if self._faults[parts.path] else None
+
+        delay = self.latency + self._path_latency.get(parts.path, 0.0)
+        if delay:
+            time.sleep(delay)
+
+        if fault is not None:
+            kind, status = fault
+            if kind == "hang":
+                self._release.wait(60)
+                return None, None
+            return status, {"code": status, "message": "injected error"}
+
+        response = self.responses.get(parts.path)
+        if response is None:
+            return 404, {"code": 404, "message": "not found"}
+        return 200, response
+
+
+class _FakeSportsHandler(BaseHTTPRequestHandler):
+    def _read_body(self):
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(chunks)
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _serve(self):
+        body = self._read_body()
+        status, response = self.server.fake._handle(self.command, self.path, dict(self.headers), body)
+        if status is None:
+            return
+        payload = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = _serve
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+
+from utils import auxiliary_util
+from utils.auxiliary_util import haversine_distance
+
+
+LATITUDES = [31.031599, 31.0316, 31.0301, 31.0264, 31.0264]
+LONGITUDES = [121.442938, 121.4441, 121.4502, 121.4551, 121.4551]
+
+
+class BatchedHaversineTests(unittest.TestCase):
+    def _engines(self):
+        engines = [None]
+        if auxiliary_util.np is not None:
+            engines.append(auxiliary_util.np)
+        return engines
+
+    def test_pairwise_and_cumulative_match_scalar_haversine(self):
+        expected = [
+            haversine_distance(LATITUDES[i], LONGITUDES[i], LATITUDES[i + 1], LONGITUDES[i + 1])
+            for i in range(len(LATITUDES) - 1)
+        ]
+        for numpy_module in self._engines():
+            with self.subTest(numpy=numpy_module is not None), patch.object(auxiliary_util, "np", numpy_module):
+                pairwise = auxiliary_util.polyline_distances(LATITUDES, LONGITUDES)
+                cumulative = auxiliary_util.cumulative_distances(LATITUDES, LONGITUDES)
+
+                self.assertEqual(len(pairwise), len(expected))
+                for got, want in zip(pairwise, expected):
+                    self.assertAlmostEqual(got, want, places=6)
+
+                self.assertEqual(len(cumulative), len(LATITUDES))
+                self.assertEqual(cumulative[0], 0.0)
+                self.assertAlmostEqual(cumulative[-1], sum(expected), places=6)
+                self.assertEqual(pairwise[-1], 0.0)
+
+    def test_elementwise_pairs(self):
+        for numpy_module in self._engines():
+            with self.subTest(numpy=numpy_module is not None), patch.object(auxiliary_util, "np", numpy_module):
+                distances = auxiliary_util.haversine_distances(LATITUDES[:2], LONGITUDES[:2], LATITUDES[2:4], LONGITUDES[2:4])
+                self.assertAlmostEqual(distances[0], haversine_distance(LATITUDES[0], LONGITUDES[0], LATITUDES[2], LONGITUDES[2]), places=6)
+                self.assertAlmostEqual(distances[1], haversine_distance(LATITUDES[1], LONGITUDES[1], LATITUDES[3], LONGITUDES[3]), places=6)
+
+    def test_degenerate_polylines(self):
+        for numpy_module in self._engines():
+            with self.subTest(numpy=numpy_module is not None), patch.object(auxiliary_util, "np", numpy_module):
+                self.assertEqual(len(auxiliary_util.cumulative_distances([], [])), 0)
+                self.assertEqual(list(auxiliary_util.cumulative_distances([31.0], [121.0])), [0.0])
+                self.assertEqual(len(auxiliary_util.polyline_distances([31.0], [121.0])), 0)
+
+
+class CoordinateFormattingTests(unittest.TestCase):
+    # 包含 .5 精确舍入边界（奇数/256）、负数、零、-0.0、整数位变化与非有限值
+    VALUES = [
+        121.442938, 31.031599, 121.00390625, 121.01171875, 0.00390625, 99.99999995, 100.0,
+        -121.4, -0.00000004, 0.0, -0.0, 1e-9, 1e12, float("inf"), float("nan"),
+    ] + [121.442938 + i * 0.0000313 for i in range(200)]
+
+    def _engines(self):
+        engines = [None]
+        if auxiliary_util.np is not None:
+            engines.append(auxiliary_util.np)
+        return engines
+
+    def test_round_coordinates_matches_string_round_trip(self):
+        expected = [float(f"{v:.7f}") for v in self.VALUES]
+        for numpy_module in self._engines():
+            with self.subTest(numpy=numpy_module is not None), patch.object(auxiliary_util, "np", numpy_module):
+                got = auxiliary_util.round_coordinates(self.VALUES)
+                self.assertEqual([repr(v) for v in got], [repr(v) for v in expected])
+
+    def test_format_locations_matches_f_string(self):
+        longitudes = self.VALUES
+        latitudes = list(reversed(self.VALUES))
+        expected = [f"{lon:.7f},{lat:.7f}" for lon, lat in zip(longitudes, latitudes)]
+        for numpy_module in self._engines():
+            with self.subTest(numpy=numpy_module is not None), patch.object(auxiliary_util, "np", numpy_module):
+                self.assertEqual(auxiliary_util.format_locations(longitudes, latitudes), expected)
+
+    def test_format_locations_bulk_path(self):
+        longitudes = [121.442938 + i * 0.0000313 for i in range(500)]
+        latitudes = [31.031599] * len(longitudes)
+        expected = [f"{lon:.7f},{lat:.7f}" for lon, lat in zip(longitudes, latitudes)]
+        self.assertEqual(auxiliary_util.format_locations(longitudes, latitudes), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import threading
+import time
+import unittest
+
+from fake_server import FakeSportsServer, MAX_STOP_LATENCY, UID_PATH, wait_for_helper_threads
+from src.api_client import create_session, make_request
+from utils.cancellation import CancellationToken, OperationCancelled, as_cancel_token, run_cancellable
+
+
+class CancellationTokenTests(unittest.TestCase):
+    def test_token_is_usable_as_stop_check_cb(self):
+        token = CancellationToken()
+        self.assertFalse(token())
+        token.cancel()
+        self.assertTrue(token())
+        self.assertTrue(token.wait(5))
+        with self.assertRaises(OperationCancelled):
+            token.sleep(5)
+
+    def test_callback_adapter_wait_returns_on_stop(self):
+        started = time.monotonic()
+        token = as_cancel_token(lambda: time.monotonic() - started > 0.2)
+
+        self.assertTrue(token.wait(5))
+        self.assertLess(time.monotonic() - started, 0.2 + MAX_STOP_LATENCY)
+        self.assertIs(as_cancel_token(token), token)
+
+    def test_run_cancellable_returns_result_and_reraises(self):
+        token = CancellationToken()
+        self.assertEqual(run_cancellable(lambda: 42, token), 42)
+        with self.assertRaises(ZeroDivisionError):
+            run_cancellable(lambda: 1 / 0, token)
+
+    def test_on_cancel_runs_before_raising(self):
+        token = CancellationToken()
+        release = threading.Event()
+        threading.Timer(0.1, token.cancel).start()
+
+        with self.assertRaises(OperationCancelled):
+            run_cancellable(lambda: release.wait(5), token, on_cancel=release.set)
+        self.assertTrue(release.is_set())
+        self.assertTrue(wait_for_helper_threads(MAX_STOP_LATENCY))
+
+
+class MakeRequestCancellationTests(unittest.TestCase):
+    def setUp(self):
+        # 模拟长时间无响应的服务器
+        self.server = FakeSportsServer().start()
+        self.addCleanup(self.server.stop)
+        self.server.inject_timeout(UID_PATH)
+        self.url = self.server.base_url + UID_PATH
+
+    def test_stop_interrupts_blocked_request(self):
+        token = CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+
+        started = time.monotonic()
+        with self.assertRaises(OperationCancelled):
+            make_request("GET", self.url, {}, log_cb=lambda message, level: None, stop_check_cb=token)
+        self.assertLess(time.monotonic() - started, 0.2 + MAX_STOP_LATENCY)
+        # 请求所在的辅助线程也随之结束，不会在后台等到超时
+        self.assertTrue(wait_for_helper_threads(MAX_STOP_LATENCY))
+
+    def test_plain_stop_callback_interrupts_blocked_request(self):
+        started = time.monotonic()
+        with self.assertRaises(OperationCancelled):
+            make_request("GET", self.url, {}, log_cb=lambda message, level: None,
+                         stop_check_cb=lambda: time.monotonic() - started > 0.2)
+        self.assertLess(time.monotonic() - started, 0.2 + MAX_STOP_LATENCY)
+        self.assertTrue(wait_for_helper_threads(MAX_STOP_LATENCY))
+
+    def test_stop_closes_caller_session(self):
+        session = create_session()
+        self.addCleanup(session.close)
+        token = CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+
+        with self.assertRaises(OperationCancelled):
+            make_request("GET", self.url, {}, log_cb=lambda message, level: None, stop_check_cb=token, session=session)
+        self.assertTrue(wait_for_helper_threads(MAX_STOP_LATENCY))
+
+        # 关闭后的 session 仍可用于后续请求
+        self.assertEqual(make_request("GET", self.url, {}, session=session)["code"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import threading
+import unittest
+
+from src.channels import (
+    PHASE_AUTH,
+    PHASE_UPLOAD,
+    LogBuffer,
+    ProgressChannel,
+    collapse_progress_runs,
+    is_progress_message,
+)
+
+
+class LogBufferTests(unittest.TestCase):
+    def test_drain_returns_entries_in_order_and_clears(self):
+        buffer = LogBuffer()
+        buffer.append("开始", "info")
+        buffer.append("失败", "error")
+
+        self.assertEqual(buffer.drain(), ([("开始", "info"), ("失败", "error")], 0))
+        self.assertEqual(buffer.drain(), ([], 0))
+
+    def test_overflow_drops_oldest_and_counts(self):
+        buffer = LogBuffer(max_pending=3)
+        for i in range(5):
+            buffer.append(f"m{i}")
+
+        entries, dropped = buffer.drain()
+        self.assertEqual([message for message, _ in entries], ["m2", "m3", "m4"])
+        self.assertEqual(dropped, 2)
+        self.assertEqual(buffer.drain(), ([], 0))
+
+    def test_concurrent_appends_are_not_lost(self):
+        buffer = LogBuffer(max_pending=10000)
+        threads = [threading.Thread(target=lambda: [buffer.append("x") for _ in range(1000)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        entries, dropped = buffer.drain()
+        self.assertEqual((len(entries), dropped), (4000, 0))
+
+
+class ProgressCollapseTests(unittest.TestCase):
+    def test_is_progress_message(self):
+        self.assertTrue(is_progress_message("已完成3/25"))
+        self.assertFalse(is_progress_message("已完成"))
+        self.assertFalse(is_progress_message("第1次: 已完成3/25"))
+
+    def test_consecutive_progress_messages_keep_latest(self):
+        entries = [
+            ("已完成1/3", "info"),
+            ("已完成2/3", "info"),
+            ("上传成功", "success"),
+            ("已完成3/3", "info"),
+        ]
+        self.assertEqual(
+            collapse_progress_runs(entries),
+            [("已完成2/3", "info"), ("上传成功", "success"), ("已完成3/3", "info")],
+        )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class ProgressChannelTests(unittest.TestCase):
+    def test_take_returns_only_latest_state_once(self):
+        channel = ProgressChannel(clock=FakeClock())
+        self.assertIsNone(channel.take())
+
+        channel(10, 100, "获取认证信息和跑步规则...", PHASE_AUTH)
+        channel(1, 5, "已完成1/5", PHASE_UPLOAD)
+        channel(2, 5, "已完成2/5", PHASE_UPLOAD)
+
+        state = channel.take()
+        self.assertEqual((state.phase, state.index, state.total, state.message), (PHASE_UPLOAD, 2, 5, "已完成2/5"))
+        self.assertIsNone(channel.take())
+        self.assertIs(channel.latest, state)
+
+    def test_upload_phase_reports_eta_and_throughput(self):
+        clock = FakeClock()
+        channel = ProgressChannel(clock=clock)
+        channel(10, 100, "获取认证信息和跑步规则...", PHASE_AUTH)
+        clock.now += 5
+        channel(0, 4, "已完成0/4", PHASE_UPLOAD)
+        self.assertIsNone(channel.take().eta_sec)
+
+        clock.now += 30
+        channel(1, 4, "已完成1/4", PHASE_UPLOAD)
+        state = channel.take()
+        self.assertAlmostEqual(state.eta_sec, 90.0)
+        self.assertAlmostEqual(state.throughput_per_min, 2.0)
+        self.assertAlmostEqual(state.elapsed_sec, 35.0)
+
+    def test_phase_defaults_to_previous_phase(self):
+        channel = ProgressChannel(clock=FakeClock())
+        channel(0, 3, "已完成0/3", PHASE_UPLOAD)
+        channel(1, 3, "已完成1/3")
+        self.assertEqual(channel.take().phase, PHASE_UPLOAD)
+
+
+if __name__ == "__main__":
+    unittest.main()
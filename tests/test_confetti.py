@@ -0,0 +1,50 @@
+import unittest
+
+from src.confetti import ConfettiPool
+
+
+class ConfettiPoolTests(unittest.TestCase):
+    def test_spawn_respects_capacity(self):
+        pool = ConfettiPool(2)
+        self.assertTrue(pool.spawn(0, 0, 0, 0, 5, 8, 0, 0, 1))
+        self.assertTrue(pool.spawn(0, 0, 0, 0, 5, 8, 0, 0, 2))
+        self.assertFalse(pool.spawn(0, 0, 0, 0, 5, 8, 0, 0, 3))
+        self.assertEqual(len(pool), 2)
+
+        pool.clear()
+        self.assertEqual(len(pool), 0)
+
+    def test_step_applies_gravity_drag_and_fade(self):
+        pool = ConfettiPool(1)
+        pool.spawn(10.0, 20.0, 1.0, -2.0, 5, 8, 30.0, 2.0, 0)
+        pool.step((0.0, 0.5), 0.5, 0.25, 100)
+
+        self.assertEqual((pool.vx[0], pool.vy[0]), (0.5, -0.75))
+        self.assertEqual((pool.x[0], pool.y[0]), (10.5, 19.25))
+        self.assertEqual(pool.angle[0], 32.0)
+        self.assertEqual(pool.life[0], 0.75)
+
+    def test_dead_particles_are_swap_removed_and_survivors_updated_once(self):
+        pool = ConfettiPool(4)
+        pool.spawn(0.0, 0.0, 0.0, 0.0, 5, 8, 0, 0, 0)
+        pool.spawn(0.0, 500.0, 0.0, 0.0, 5, 8, 0, 0, 1)  # 已落出窗口
+        pool.spawn(0.0, 0.0, 0.0, 0.0, 5, 8, 0, 0, 2)
+        pool.spawn(0.0, 600.0, 0.0, 0.0, 5, 8, 0, 0, 3)  # 已落出窗口
+
+        pool.step((0.0, 1.0), 1.0, 0.1, 100)
+
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(sorted(pool.color_index[:2]), [0, 2])
+        self.assertEqual(list(pool.y[:2]), [1.0, 1.0])
+        self.assertEqual(list(pool.life[:2]), [0.9, 0.9])
+
+    def test_particles_expire_after_life_runs_out(self):
+        pool = ConfettiPool(1)
+        pool.spawn(0.0, 0.0, 0.0, 0.0, 5, 8, 0, 0, 0)
+        for _ in range(3):
+            pool.step((0.0, 0.0), 1.0, 0.5, 100)
+        self.assertEqual(len(pool), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
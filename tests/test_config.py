@@ -1,3 +1,5 @@
+import json
+import math
 import os
 import sys
 import tempfile
@@ -53,5 +55,149 @@ class GetConfigPathTests(unittest.TestCase):
                 self.assertIn("跑步天数", f.read())
 
 
+class ConfigSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.tmp.name, "config.json")
+        self._write({"跑步天数": 7, "指定日期列表": ["2025-01-15"], "配速_分钟每公里": "fast"})
+        config._cached_config_path = None
+        config._cached_config_snapshot = None
+        config._cached_config_stat = None
+
+    def tearDown(self):
+        config._cached_config_path = None
+        config._cached_config_snapshot = None
+        config._cached_config_stat = None
+        self.tmp.cleanup()
+
+    def _write(self, data):
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def test_snapshot_is_read_only_and_keeps_raw_values(self):
+        snapshot = config.load_config_snapshot(self.config_path)
+        self.assertEqual(snapshot["跑步天数"], 7)
+        self.assertEqual(snapshot["指定日期列表"], ("2025-01-15",))
+        self.assertEqual(snapshot["配速_分钟每公里"], "fast")
+        with self.assertRaises(TypeError):
+            snapshot["跑步天数"] = 1
+
+    def test_invalid_value_on_disk_fails_run_settings(self):
+        with self.assertRaisesRegex(ValueError, "配速_分钟每公里"):
+            config.load_run_settings(self.config_path)
+
+    def test_cached_loader_reuses_snapshot_until_file_changes(self):
+        with patch.object(config, "get_config_path", return_value=self.config_path) as get_path:
+            first = config.load_config_cached()
+            self.assertIs(config.load_config_cached(), first)
+
+            self._write({"跑步天数": 12})
+            os.utime(self.config_path, ns=(0, os.stat(self.config_path).st_mtime_ns + 1_000_000))
+            second = config.load_config_cached()
+
+        self.assertIsNot(second, first)
+        self.assertEqual(second["跑步天数"], 12)
+        # 配置路径只解析一次
+        self.assertEqual(get_path.call_count, 1)
+
+    def test_defaults_are_not_shared_between_loads(self):
+        missing = os.path.join(self.tmp.name, "missing.json")
+        loaded = config.load_config(missing)
+        loaded["指定日期列表"].append("2025-01-01")
+        self.assertEqual(config.load_config(missing)["指定日期列表"], [])
+
+
+class SaveConfigTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.tmp.name, "config.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unchanged_content_is_not_rewritten(self):
+        self.assertTrue(config.save_config({"跑步天数": 3}, self.config_path))
+        mtime = os.stat(self.config_path).st_mtime_ns
+        with patch.object(config.os, "replace") as replace:
+            self.assertFalse(config.save_config({"跑步天数": 3}, self.config_path))
+        replace.assert_not_called()
+        self.assertEqual(os.stat(self.config_path).st_mtime_ns, mtime)
+
+        self.assertTrue(config.save_config({"跑步天数": 4}, self.config_path))
+        self.assertEqual(config.load_config(self.config_path)["跑步天数"], 4)
+
+    def test_external_edit_is_overwritten_by_same_config(self):
+        self.assertTrue(config.save_config({"跑步天数": 3}, self.config_path))
+        # 模拟在界面之外手动修改了配置文件
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            json.dump({"跑步天数": 7}, f)
+
+        self.assertTrue(config.save_config({"跑步天数": 3}, self.config_path))
+        self.assertEqual(config.load_config(self.config_path)["跑步天数"], 3)
+
+    def test_failed_write_keeps_previous_file_intact(self):
+        config.save_config({"跑步天数": 3}, self.config_path)
+        with patch.object(config.os, "fsync", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                config.save_config({"跑步天数": 9}, self.config_path)
+        self.assertEqual(config.load_config(self.config_path)["跑步天数"], 3)
+        self.assertEqual(os.listdir(self.tmp.name), ["config.json"])
+
+    def test_writer_saves_latest_config_in_background(self):
+        errors = []
+        writer = config.ConfigWriter(self.config_path, on_error=errors.append)
+        try:
+            for days in range(1, 20):
+                writer.submit({"跑步天数": days})
+            self.assertTrue(writer.flush(timeout=5))
+        finally:
+            writer.close(timeout=5)
+        self.assertEqual(errors, [])
+        self.assertEqual(config.load_config(self.config_path)["跑步天数"], 19)
+
+    def test_writer_reports_errors(self):
+        errors = []
+        writer = config.ConfigWriter(os.path.join(self.tmp.name, "missing", "config.json"), on_error=errors.append)
+        try:
+            writer.submit({"跑步天数": 1})
+            self.assertTrue(writer.flush(timeout=5))
+        finally:
+            writer.close(timeout=5)
+        self.assertEqual(len(errors), 1)
+
+
+class RunSettingsTests(unittest.TestCase):
+    def test_derived_values_are_precomputed(self):
+        settings = config.RunSettings.from_mapping(dict(config.DEFAULT_CONFIG, **{"GPS采样间隔_秒": 0}))
+        self.assertEqual(settings.interval_seconds, 3)
+        self.assertEqual(settings.interval_ms, 3000)
+        self.assertEqual(settings.total_duration_sec, 1050)
+        self.assertAlmostEqual(settings.speed_mps, 5000 / 1050)
+        self.assertAlmostEqual(settings.meters_per_degree_lon, 111111 * math.cos(math.radians(31.031599)))
+
+    def test_settings_are_immutable_and_slotted(self):
+        settings = config.RunSettings.from_mapping(config.DEFAULT_CONFIG)
+        self.assertFalse(hasattr(settings, "__dict__"))
+        with self.assertRaises(AttributeError):
+            settings.run_days = 1
+
+    def test_invalid_values_are_rejected(self):
+        for overrides in ({"每日距离_米": "far"}, {"配速_分钟每公里": True},
+                          {"参数随机": True, "距离最小_米": 7000, "距离最大_米": 6000},
+                          {"参数随机": True, "配速最小_分钟每公里": 6.0, "配速最大_分钟每公里": 5.0},
+                          {"跑步时间随机": True, "随机时间范围_开始时": 21}):
+            with self.subTest(overrides=overrides):
+                with self.assertRaises(ValueError):
+                    config.RunSettings.from_mapping(dict(config.DEFAULT_CONFIG, **overrides))
+
+    def test_ranges_are_ignored_when_their_mode_is_off(self):
+        for overrides in ({"参数随机": False, "距离最小_米": 7000, "距离最大_米": 6000},
+                          {"参数随机": False, "配速最小_分钟每公里": 6.0, "配速最大_分钟每公里": 5.0},
+                          {"跑步时间随机": False, "随机时间范围_开始时": 21, "随机时间范围_结束时": 20}):
+            with self.subTest(overrides=overrides):
+                settings = config.RunSettings.from_mapping(dict(config.DEFAULT_CONFIG, **overrides))
+                self.assertEqual(settings.distance_m, 5000)
+
+
 if __name__ == "__main__":
     unittest.main()
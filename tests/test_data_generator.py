@@ -0,0 +1,59 @@
+import json
+import random
+import unittest
+import uuid
+from unittest.mock import patch
+
+from src import data_generator
+from src.track import track_json_default
+
+
+BASE_APP_CONFIG = {
+    "参数随机": False,
+    "每日距离_米": 5000,
+    "配速_分钟每公里": 3.5,
+    "GPS采样间隔_秒": 1,
+    "起点纬度": 31.031599,
+    "起点经度": 121.442938,
+}
+
+RUNTIME_CONFIG = {
+    "USER_ID": "tester",
+    "INTERVAL_SECONDS": 3,
+    "START_TIME_EPOCH_MS": 1735689600000,
+}
+
+
+def _generate(settings, use_numpy):
+    """在固定随机种子与 uuid 下生成一次载荷，返回 JSON 文本。"""
+    random.seed(20250101)
+    counter = iter(range(1, 1_000_000))
+    with patch.object(data_generator, "USE_NUMPY_ENGINE", use_numpy), \
+         patch.object(data_generator.uuid, "uuid4", side_effect=lambda: uuid.UUID(int=next(counter))):
+        payload, distance, duration = data_generator.generate_running_data_payload(dict(RUNTIME_CONFIG), [], {}, settings=settings)
+    return json.dumps(payload, default=track_json_default), distance, duration
+
+
+@unittest.skipIf(data_generator.np is None, "NumPy 未安装")
+class TrackEngineTests(unittest.TestCase):
+    def test_numpy_engine_is_byte_identical_to_python_engine(self):
+        cases = [
+            {},
+            {"GPS采样间隔_秒": 3},
+            {"每日距离_米": 12345, "配速_分钟每公里": 4.7, "GPS采样间隔_秒": 7},
+            {"参数随机": True, "距离最小_米": 4000, "距离最大_米": 6000},
+        ]
+        for overrides in cases:
+            settings = dict(BASE_APP_CONFIG, **overrides)
+            with self.subTest(overrides=overrides):
+                self.assertEqual(_generate(settings, use_numpy=True), _generate(settings, use_numpy=False))
+
+    def test_numpy_engine_honours_stop_request(self):
+        with patch.object(data_generator, "USE_NUMPY_ENGINE", True):
+            with self.assertRaises(data_generator.SportsUploaderError):
+                data_generator.generate_running_data_payload(dict(RUNTIME_CONFIG), [], {}, stop_check_cb=lambda: True,
+                                                             settings=BASE_APP_CONFIG)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,16 @@
 import os
 import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import patch
 
 from src import login
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from utils.auxiliary_util import SportsUploaderError
+from utils.cancellation import CancellationToken, OperationCancelled
+from utils.metrics import MetricsRecorder
+from fake_server import FakeSportsServer, MAX_STOP_LATENCY, UID_PATH, wait_for_helper_threads
 
 
 class FakeCaptchaResponse:
@@ -14,10 +21,40 @@ class FakeSession:
     def __init__(self):
         self.urls = []
 
-    def get(self, url):
+    def get(self, url, timeout=None):
         self.urls.append(url)
         return FakeCaptchaResponse()
 
+    def close(self):
+        pass
+
+
+class FailingSession:
+    def get(self, url, timeout=None):
+        raise RequestsConnectionError("unreachable")
+
+    def close(self):
+        pass
+
+
+class FlakySession:
+    """前 failures 次请求抛出网络错误，之后返回登录页面。"""
+    def __init__(self, failures):
+        self.failures = failures
+
+    def get(self, url, timeout=None):
+        if self.failures:
+            self.failures -= 1
+            raise RequestsConnectionError("unreachable")
+        return FakeLoginPageResponse()
+
+    def close(self):
+        pass
+
+
+class FakeLoginPageResponse:
+    text = "login page"
+
 
 class FakeSolverResponse:
     def json(self):
@@ -59,5 +96,63 @@ class LoginCaptchaTests(unittest.TestCase):
         post.assert_called_once()
 
 
+class LoginFlowTests(unittest.TestCase):
+    def test_stop_request_cancels_before_network(self):
+        with patch.object(login, "get_jalogin_from_authorize") as authorize:
+            with self.assertRaises(SportsUploaderError):
+                login.login("user", "pass", stop_check_cb=lambda: True)
+        authorize.assert_not_called()
+
+    def test_stop_request_interrupts_retry_wait(self):
+        token = CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+
+        started = time.monotonic()
+        with self.assertRaises(OperationCancelled):
+            login._get_login_page(FailingSession(), "https://example.test/jalogin", cancel_token=token)
+        self.assertLess(time.monotonic() - started, 0.2 + MAX_STOP_LATENCY)
+
+    def test_stop_request_aborts_hung_request(self):
+        server = FakeSportsServer().start()
+        self.addCleanup(server.stop)
+        server.inject_timeout(UID_PATH)
+        session = login._create_session()
+        token = CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+
+        started = time.monotonic()
+        with self.assertRaises(OperationCancelled):
+            login._get_login_page(session, server.base_url + UID_PATH, cancel_token=token)
+        self.assertLess(time.monotonic() - started, 0.2 + MAX_STOP_LATENCY)
+        # 关闭 session 中断了进行中的请求，辅助线程不会在后台继续等待响应
+        self.assertTrue(wait_for_helper_threads(MAX_STOP_LATENCY))
+
+    def test_retries_are_recorded_in_metrics(self):
+        records = []
+        token = CancellationToken()
+        token.sleep = lambda seconds: None
+
+        page = login._get_login_page(FlakySession(failures=2), "https://example.test/jalogin",
+                                     cancel_token=token, metrics=MetricsRecorder(records.append))
+
+        self.assertEqual(page, "login page")
+        retries = [record for record in records if record["name"] == "retry"]
+        self.assertEqual(len(retries), 2)
+        self.assertEqual(retries[0]["stage"], "_get_login_page")
+
+    def test_rejected_login_raises(self):
+        logs = []
+        token = CancellationToken()
+        token.sleep = lambda seconds: None
+        with patch.object(login, "get_jalogin_from_authorize", return_value="https://example.test/jalogin"), \
+                patch.object(login, "_get_login_page", return_value="img.src = 'captcha?uuid=1&t='"), \
+                patch.object(login, "_get_captcha", return_value="captcha.jpeg"), \
+                patch.object(login, "_indentify_captcha", return_value="abcd"), \
+                patch.object(login, "_post_login_request", return_value=-1):
+            with self.assertRaises(SportsUploaderError):
+                login.login("user", "pass", log_cb=lambda message, level: logs.append(message), stop_check_cb=token)
+        self.assertIn("正在提交登录请求...", logs)
+
+
 if __name__ == "__main__":
     unittest.main()
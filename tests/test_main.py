@@ -0,0 +1,136 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fake_server import (FakeSportsServer, FAKE_AUTH_TOKEN, MAX_STOP_LATENCY, MY_DATA_PATH, POINT_RULE_PATH, UID_PATH,
+                         UPLOAD_PATH, fixed_run_settings, wait_for_helper_threads)
+from src import api_client, main
+from src.main import run_sports_upload
+from utils.cancellation import CancellationToken
+
+
+class RunSportsUploadTests(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeSportsServer().start()
+        self.addCleanup(self.server.stop)
+        self.logs = []
+
+    def _run(self, runs=3, **kwargs):
+        return run_sports_upload(
+            self.server.client_config(),
+            log_cb=lambda message, level: self.logs.append((level, message)),
+            settings=fixed_run_settings(runs),
+            **kwargs
+        )
+
+    def test_uploads_every_run(self):
+        progress = []
+        success, message = self._run(progress_callback=lambda *args: progress.append(args))
+
+        self.assertTrue(success)
+        self.assertEqual(message, "完成: 3/3 成功，0/3 失败")
+        self.assertEqual(len(self.server.requests_to(UID_PATH)), 1)
+        self.assertEqual(len(self.server.requests_to(MY_DATA_PATH)), 1)
+        self.assertEqual(len(self.server.requests_to(POINT_RULE_PATH)), 1)
+
+        uploads = self.server.requests_to(UPLOAD_PATH)
+        self.assertEqual(len(uploads), 3)
+        self.assertEqual(uploads[0].headers["Authorization"], FAKE_AUTH_TOKEN)
+        for body in self.server.uploads:
+            self.assertEqual(body[0]["userId"], "tester")
+            self.assertTrue(body[0]["tracks"])
+        self.assertEqual(progress[-1], (3, 3, "已完成", "done"))
+
+    def test_failed_upload_is_counted_and_job_continues(self):
+        self.server.inject_error(UPLOAD_PATH, status=500)
+
+        success, message = self._run()
+
+        self.assertTrue(success)
+        self.assertEqual(message, "完成: 2/3 成功，1/3 失败")
+        self.assertEqual(len(self.server.requests_to(UPLOAD_PATH)), 3)
+
+    def test_auth_error_aborts_before_upload(self):
+        self.server.inject_error(UID_PATH, status=502)
+
+        success, message = self._run()
+
+        self.assertFalse(success)
+        self.assertIn("HTTP Error", message)
+        self.assertEqual(self.server.requests_to(UPLOAD_PATH), [])
+
+    def test_upload_timeout_is_counted_as_failure(self):
+        self.server.inject_timeout(UPLOAD_PATH)
+
+        with patch.object(api_client, "REQUEST_TIMEOUT_SECONDS", 0.3):
+            started = time.monotonic()
+            success, message = self._run()
+            elapsed = time.monotonic() - started
+
+        self.assertTrue(success)
+        self.assertEqual(message, "完成: 2/3 成功，1/3 失败")
+        self.assertLess(elapsed, 0.3 + 2.0)
+
+    def test_stop_interrupts_hung_upload(self):
+        self.server.inject_timeout(UPLOAD_PATH)
+        token = CancellationToken()
+        threading.Timer(0.3, token.cancel).start()
+
+        started = time.monotonic()
+        success, message = self._run(stop_check_cb=token)
+
+        self.assertFalse(success)
+        self.assertEqual(message, "任务已停止。")
+        self.assertLess(time.monotonic() - started, 0.3 + MAX_STOP_LATENCY)
+        self.assertEqual(len(self.server.requests_to(UPLOAD_PATH)), 1)
+        self.assertTrue(wait_for_helper_threads(MAX_STOP_LATENCY))
+
+    def test_job_latency_is_dominated_by_server_latency(self):
+        latency = 0.05
+        runs = 5
+        self.server.latency = latency
+
+        started = time.monotonic()
+        success, _ = self._run(runs=runs)
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(success)
+        # 3 个认证请求与 runs 个上传请求依次进行，其余开销应远小于网络等待
+        self.assertGreaterEqual(elapsed, (3 + runs) * latency)
+        self.assertLess(elapsed, (3 + runs) * latency + 1.5)
+
+
+    def test_uploads_keep_chronological_order(self):
+        self._run(runs=4)
+
+        start_times = [body[0]["tracks"][0]["points"][0]["locatetime"] for body in self.server.uploads]
+        self.assertEqual(len(start_times), 4)
+        # 天数模式从昨天起往前推，依次上传的开始时间递减
+        self.assertEqual(start_times, sorted(start_times, reverse=True))
+
+    def test_generation_overlaps_with_upload(self):
+        generate_sec = 0.15
+        latency = 0.15
+        runs = 4
+        self.server.set_latency(UPLOAD_PATH, latency)
+        original_generate = main.generate_running_data_payload
+
+        def slow_generate(*args, **kwargs):
+            time.sleep(generate_sec)
+            return original_generate(*args, **kwargs)
+
+        with patch.object(main, "generate_running_data_payload", slow_generate):
+            started = time.monotonic()
+            success, message = self._run(runs=runs)
+            elapsed = time.monotonic() - started
+
+        self.assertTrue(success)
+        self.assertEqual(message, f"完成: {runs}/{runs} 成功，0/{runs} 失败")
+        # 串行执行至少需要 (runs + 1) 次生成加 runs 次上传；流水线下后续生成被上传等待掩盖
+        serial_sec = (runs + 1) * generate_sec + runs * latency
+        self.assertLess(elapsed, serial_sec - (runs - 1) * generate_sec / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import json
+import os
+import tempfile
+import unittest
+
+from fake_server import FakeSportsServer, UID_PATH, UPLOAD_PATH, fixed_run_settings
+from src.main import run_sports_upload
+from utils.metrics import NULL_METRICS, JsonlTraceSink, MetricsRecorder, metered_chunks
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class MetricsRecorderTests(unittest.TestCase):
+    def test_null_metrics_is_a_no_op(self):
+        with NULL_METRICS.timer("auth"):
+            pass
+        NULL_METRICS.count("bytes_sent", 10)
+        NULL_METRICS.observe("serialize", 1.0)
+        self.assertIs(NULL_METRICS.bind(run=1), NULL_METRICS)
+        self.assertFalse(NULL_METRICS.enabled)
+
+    def test_timer_emits_duration_with_bound_tags(self):
+        records = []
+        clock = FakeClock()
+        metrics = MetricsRecorder(records.append, clock=clock).bind(run=2)
+
+        with metrics.timer("generate"):
+            clock.now += 0.25
+        metrics.count("bytes_sent", 128)
+
+        timer, counter = records
+        self.assertEqual((timer["type"], timer["name"], timer["run"]), ("timer", "generate", 2))
+        self.assertAlmostEqual(timer["duration_ms"], 250.0)
+        self.assertNotIn("error", timer)
+        self.assertEqual((counter["type"], counter["name"], counter["value"], counter["run"]), ("counter", "bytes_sent", 128, 2))
+
+    def test_timer_records_error_and_reraises(self):
+        records = []
+        metrics = MetricsRecorder(records.append)
+
+        with self.assertRaises(ZeroDivisionError):
+            with metrics.timer("upload"):
+                1 / 0
+
+        self.assertEqual(records[0]["error"], "ZeroDivisionError")
+
+    def test_summary_is_shared_by_bound_recorders(self):
+        clock = FakeClock()
+        metrics = MetricsRecorder(lambda record: None, clock=clock)
+        for run, seconds in ((1, 0.1), (2, 0.3)):
+            with metrics.bind(run=run).timer("upload"):
+                clock.now += seconds
+        metrics.observe("serialize", 5.0)
+
+        summary = metrics.summary()
+        self.assertEqual(list(summary), ["upload", "serialize"])
+        count, total_ms, max_ms = summary["upload"]
+        self.assertEqual(count, 2)
+        self.assertAlmostEqual(total_ms, 400.0)
+        self.assertAlmostEqual(max_ms, 300.0)
+        self.assertIn("upload", metrics.format_summary())
+
+    def test_metered_chunks_counts_bytes(self):
+        records = []
+        chunks = list(metered_chunks(iter([b"ab", b"cde"]), MetricsRecorder(records.append)))
+
+        self.assertEqual(chunks, [b"ab", b"cde"])
+        self.assertEqual([record["name"] for record in records], ["serialize", "bytes_sent"])
+        self.assertEqual(records[1]["value"], 5)
+
+    def test_jsonl_sink_appends_one_record_per_line(self):
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        sink = JsonlTraceSink(path)
+        metrics = MetricsRecorder(sink)
+        metrics.count("retry", stage="登录")
+        with metrics.timer("auth"):
+            pass
+        sink.close()
+        sink({"ignored": True})
+
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record["name"] for record in records], ["retry", "auth"])
+        self.assertEqual(records[0]["stage"], "登录")
+
+
+class RunSportsUploadMetricsTests(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeSportsServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_records_every_stage_of_the_job(self):
+        self.server.inject_error(UPLOAD_PATH, status=500)
+        records = []
+
+        success, _ = run_sports_upload(
+            self.server.client_config(),
+            log_cb=lambda message, level: None,
+            settings=fixed_run_settings(2),
+            metrics=MetricsRecorder(records.append),
+        )
+
+        self.assertTrue(success)
+        timers = [(record["name"], record.get("run")) for record in records if record["type"] == "timer"]
+        for expected in (("auth", None), ("generate", None), ("generate", 1), ("upload", 1), ("serialize", 1),
+                         ("generate", 2), ("upload", 2), ("serialize", 2)):
+            self.assertIn(expected, timers)
+
+        http_paths = [record["path"] for record in records if record["name"] == "http"]
+        self.assertEqual(http_paths.count(UID_PATH), 1)
+        self.assertEqual(http_paths.count(UPLOAD_PATH), 2)
+
+        sent = {record["run"]: record["value"] for record in records if record["name"] == "bytes_sent"}
+        uploads = self.server.requests_to(UPLOAD_PATH)
+        self.assertEqual(sent, {1: len(uploads[0].body), 2: len(uploads[1].body)})
+
+        outcomes = {record["run"]: record["outcome"] for record in records if record["name"] == "upload_result"}
+        self.assertEqual(outcomes, {1: "error", 2: "success"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import json
+import random
+import unittest
+
+from src import data_generator
+from src.payload_encoder import encode_payload, iter_payload_json
+from src.track import TrackPoints, track_json_default
+
+
+APP_CONFIG = {
+    "参数随机": False,
+    "每日距离_米": 8000,
+    "配速_分钟每公里": 4.2,
+    "GPS采样间隔_秒": 1,
+    "起点纬度": 31.031599,
+    "起点经度": 121.442938,
+}
+
+RUNTIME_CONFIG = {
+    "USER_ID": "tester",
+    "INTERVAL_SECONDS": 3,
+    "START_TIME_EPOCH_MS": 1735689600000,
+}
+
+
+class PayloadEncoderTests(unittest.TestCase):
+    def _payload(self):
+        random.seed(7)
+        payload, _, _ = data_generator.generate_running_data_payload(dict(RUNTIME_CONFIG), [], {}, settings=APP_CONFIG)
+        return payload
+
+    def test_stream_matches_json_dumps(self):
+        payload = self._payload()
+        expected = json.dumps(payload, default=track_json_default).encode("utf-8")
+        self.assertEqual(encode_payload(payload), expected)
+
+    def test_stream_is_chunked(self):
+        payload = self._payload()
+        chunks = list(iter_payload_json(payload, chunk_size=4096))
+        self.assertGreater(len(chunks), 1)
+        # 每块至多超出目标大小一个轨迹点的长度
+        self.assertTrue(all(len(chunk) < 4096 + 256 for chunk in chunks))
+        self.assertEqual(b"".join(chunks), encode_payload(payload))
+
+    def test_edge_values_match_json_dumps(self):
+        track = TrackPoints([31.0], [121.0], [1])
+        payload = [{"empty_list": [], "empty_dict": {}, "text": "跑步\"", "none": None, "flag": True,
+                    "points": track.segment(0, 1), "no_points": track.segment(1, 1), "all": track}]
+        self.assertEqual(encode_payload(payload), json.dumps(payload, default=track_json_default).encode("utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
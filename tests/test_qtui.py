@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+import qtui
+from src.channels import ProgressChannel
+
+
+class WorkerMetricsSummaryTests(unittest.TestCase):
+    def setUp(self):
+        self.app = QApplication.instance() or QApplication([])
+        self.window = qtui.SportsUploaderUI()
+        self.addCleanup(self.window.close)
+
+        fd, self.trace_path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, self.trace_path)
+
+    def test_upload_finished_shows_metrics_summary(self):
+        window = self.window
+        window._progress_channel = ProgressChannel()
+        worker = qtui.WorkerThread({"USER_ID": "u", "PASSWORD": "p"}, window._log_buffer, window._progress_channel)
+        worker.finished.connect(window.upload_finished)
+
+        # 直接在当前线程调用 run：finished 同步触发 upload_finished，汇总必须在此之前写入日志缓冲
+        with patch.object(qtui, "TRACE_METRICS", True), \
+             patch.object(qtui, "METRICS_TRACE_PATH", self.trace_path), \
+             patch.object(qtui.WorkerThread, "_login", return_value="网络错误"):
+            worker.run()
+
+        log_text = window.log_output_area.toPlainText()
+        self.assertIn(worker.metrics.format_summary().splitlines()[0], log_text)
+        self.assertIn(f"指标记录已写入: {self.trace_path}", log_text)
+        self.assertIn("登录失败: 网络错误", log_text)
+        self.assertLess(log_text.index("指标记录已写入"), log_text.index("登录失败: 网络错误"))
+        self.assertEqual(window._log_buffer.drain(), ([], 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
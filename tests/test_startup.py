@@ -0,0 +1,68 @@
+import os
+import re
+import sys
+import unittest
+
+from utils.startup import LazyModule, StartupProfiler
+
+
+class LazyModuleTests(unittest.TestCase):
+    def test_module_is_imported_on_first_attribute_access(self):
+        sys.modules.pop("colorsys", None)
+        profiler = StartupProfiler(enabled=True)
+        lazy = LazyModule("colorsys", profiler)
+
+        self.assertNotIn("colorsys", sys.modules)
+        self.assertEqual(lazy.rgb_to_hsv(1.0, 0.0, 0.0), (0.0, 1.0, 1.0))
+        self.assertIn("colorsys", sys.modules)
+        self.assertEqual([r[3] for r in profiler.records], ["lazy import colorsys"])
+
+    def test_missing_module_raises_on_use(self):
+        lazy = LazyModule("definitely_not_a_module_xyz")
+        with self.assertRaises(ImportError):
+            lazy.anything
+
+
+class PackagingTests(unittest.TestCase):
+    def test_release_build_bundles_lazy_modules(self):
+        # PyInstaller 看不到 LazyModule 的按名导入，发布构建必须以 --hidden-import 显式列出
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with open(os.path.join(root, "qtui.py"), encoding="utf-8") as f:
+            lazy_names = re.findall(r'LazyModule\("([\w.]+)"', f.read())
+        with open(os.path.join(root, ".github", "workflows", "release.yml"), encoding="utf-8") as f:
+            build_commands = [line for line in f if line.strip().startswith("pyinstaller ")]
+
+        self.assertTrue(lazy_names)
+        self.assertEqual(len(build_commands), 2)
+        for command in build_commands:
+            for name in lazy_names:
+                self.assertIn(f"--hidden-import {name} ", command)
+
+
+class StartupProfilerTests(unittest.TestCase):
+    def test_disabled_profiler_records_nothing(self):
+        profiler = StartupProfiler(enabled=False)
+        with profiler.measure("init_ui"):
+            pass
+        profiler.install_import_hook()
+        self.assertEqual(profiler.records, [])
+        self.assertIsNone(profiler.report())
+
+    def test_import_hook_records_first_imports(self):
+        sys.modules.pop("wave", None)
+        profiler = StartupProfiler(enabled=True)
+        profiler.install_import_hook()
+        try:
+            with profiler.measure("phase"):
+                import wave  # noqa: F401
+        finally:
+            profiler.uninstall_import_hook()
+
+        labels = [(r[2], r[3]) for r in profiler.records]
+        self.assertIn((0, "phase"), labels)
+        self.assertIn((1, "import wave"), labels)
+        self.assertIn("import wave", profiler.format_report())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from src.track import TrackPoints, TrackSegment, track_json_default
+from utils import auxiliary_util
+from utils.auxiliary_util import haversine_distance
+
+
+def _reference_point(lat, lon, locatetime):
+    """旧版生成器中每个轨迹点的字典结构。"""
+    formatted_lat = f"{lat:.7f}"
+    formatted_lon = f"{lon:.7f}"
+    return {
+        "latLng": {"latitude": float(formatted_lat), "longitude": float(formatted_lon)},
+        "location": f"{formatted_lon},{formatted_lat}",
+        "step": 0,
+        "locatetime": locatetime
+    }
+
+
+class TrackPointsTests(unittest.TestCase):
+    def setUp(self):
+        self.raw = [(31.031599, 121.442938 + i * 0.0000313, 1735689600000 + i * 3000) for i in range(20)]
+        self.track = TrackPoints(
+            [float(f"{lat:.7f}") for lat, _, _ in self.raw],
+            [float(f"{lon:.7f}") for _, lon, _ in self.raw],
+            [t for _, _, t in self.raw],
+        )
+
+    def test_points_serialize_like_reference_dicts(self):
+        expected = [_reference_point(*p) for p in self.raw]
+        self.assertEqual(json.dumps(self.track, default=track_json_default), json.dumps(expected))
+
+    def test_segment_is_zero_copy_view(self):
+        segment = self.track.segment(5, 12)
+        self.assertIsInstance(segment, TrackSegment)
+        self.assertIs(segment.track, self.track)
+        self.assertEqual(len(segment), 7)
+        self.assertEqual(segment[0], self.track[5])
+        self.assertEqual(segment[-1], self.track[11])
+        self.assertEqual(segment.first_locatetime, self.raw[5][2])
+        self.assertEqual(segment.last_locatetime, self.raw[11][2])
+
+        # 修改底层容器会反映到视图中
+        self.track.locatetimes[5] = 42
+        self.assertEqual(segment.first_locatetime, 42)
+
+    def test_segment_distance_matches_pairwise_sum(self):
+        for numpy_module in (auxiliary_util.np, None):
+            with self.subTest(numpy=numpy_module is not None), patch.object(auxiliary_util, "np", numpy_module):
+                fresh = TrackPoints(self.track.latitudes, self.track.longitudes, self.track.locatetimes)
+                segment = fresh.segment(3, 15)
+                expected = sum(
+                    haversine_distance(fresh.latitudes[i], fresh.longitudes[i], fresh.latitudes[i + 1], fresh.longitudes[i + 1])
+                    for i in range(3, 14)
+                )
+                self.assertAlmostEqual(segment.distance, expected, places=6)
+                self.assertEqual(len(fresh.cumulative_distances()), len(fresh))
+                self.assertEqual(fresh.segment(4, 5).distance, 0)
+
+    def test_segment_bounds_are_checked(self):
+        with self.assertRaises(IndexError):
+            self.track.segment(10, 25)
+
+    def test_mismatched_columns_are_rejected(self):
+        with self.assertRaises(ValueError):
+            TrackPoints([1.0], [2.0, 3.0], [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,9 +4,22 @@ import time as _time
 import datetime
 import os
 import sys
+from array import array
+from importlib.util import find_spec
+from itertools import accumulate
+from utils.startup import LazyModule
+
+# NumPy 为可选依赖，缺失时退回纯 Python 实现；首次使用时才真正导入，避免拖慢 GUI 启动
+np = LazyModule("numpy") if find_spec("numpy") is not None else None
 
 EARTH_RADIUS_METERS = 6371000
 TRACK_POINT_DECIMAL_PLACES = 7
+COORDINATE_SCALE = 10 ** TRACK_POINT_DECIMAL_PLACES
+
+# 定点快速路径的适用范围：放大后的值需落在 [1, 2^32) 内，此时乘法误差远小于 _FIXED_POINT_TIE_TOLERANCE；
+# 距离 .5 舍入边界不足容差的值无法用定点运算保证与 f-string 一致，交由字符串格式化处理
+_FIXED_POINT_MAX = 2 ** 32
+_FIXED_POINT_TIE_TOLERANCE = 1e-5
 
 def re_search(retext, text):
     m = re.search(retext, text)
@@ -62,6 +75,136 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     return R * c
 
 
+def haversine_distances(lats1, lons1, lats2, lons2):
+    """批量计算多组点对之间的 Haversine 距离（逐元素配对），返回以米为单位的 array('d')。
+
+    安装 NumPy 时整体向量化计算，否则逐对调用 haversine_distance。
+    """
+    if np is None:
+        return array('d', map(haversine_distance, lats1, lons1, lats2, lons2))
+
+    lats1 = np.asarray(lats1, dtype=np.float64)
+    lons1 = np.asarray(lons1, dtype=np.float64)
+    lats2 = np.asarray(lats2, dtype=np.float64)
+    lons2 = np.asarray(lons2, dtype=np.float64)
+
+    phi1 = np.radians(lats1)
+    phi2 = np.radians(lats2)
+    delta_phi = np.radians(lats2 - lats1)
+    delta_lambda = np.radians(lons2 - lons1)
+
+    a = np.sin(delta_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return array('d', (EARTH_RADIUS_METERS * c).tobytes())
+
+
+def polyline_distances(latitudes, longitudes):
+    """返回折线上相邻两点之间的距离，长度为点数减一。"""
+    if len(latitudes) < 2:
+        return array('d')
+    if np is None:
+        return haversine_distances(latitudes[:-1], longitudes[:-1], latitudes[1:], longitudes[1:])
+
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    return haversine_distances(latitudes[:-1], longitudes[:-1], latitudes[1:], longitudes[1:])
+
+
+def cumulative_distances(latitudes, longitudes):
+    """返回折线的累计距离，第 i 项为起点沿折线到第 i 个点的距离，首项为 0。"""
+    if len(latitudes) == 0:
+        return array('d')
+    pairwise = polyline_distances(latitudes, longitudes)
+    if np is None:
+        return array('d', accumulate(pairwise, initial=0.0))
+
+    cumulative = np.empty(len(pairwise) + 1, dtype=np.float64)
+    cumulative[0] = 0.0
+    np.cumsum(np.frombuffer(pairwise, dtype=np.float64), out=cumulative[1:])
+    return array('d', cumulative.tobytes())
+
+
+def _fixed_point(value):
+    """将坐标转换为 COORDINATE_SCALE 倍的定点整数，无法保证与 f-string 舍入一致时返回 None。"""
+    scaled = value * COORDINATE_SCALE
+    if 1 <= scaled < _FIXED_POINT_MAX and abs(scaled - math.floor(scaled) - 0.5) > _FIXED_POINT_TIE_TOLERANCE:
+        return round(scaled)
+    return None
+
+
+def _fixed_point_array(values):
+    """_fixed_point 的 NumPy 版本，返回 (定点整数数组, 快速路径是否适用的布尔掩码)。"""
+    scaled = np.asarray(values, dtype=np.float64) * COORDINATE_SCALE
+    with np.errstate(invalid="ignore"):
+        exact = (scaled >= 1) & (scaled < _FIXED_POINT_MAX) & \
+            (np.abs(scaled - np.floor(scaled) - 0.5) > _FIXED_POINT_TIE_TOLERANCE)
+    fixed = np.zeros(len(scaled), dtype=np.int64)
+    fixed[exact] = np.rint(scaled[exact])
+    return fixed, exact
+
+
+def round_coordinates(values):
+    """批量将坐标取整到 TRACK_POINT_DECIMAL_PLACES 位小数，返回 array('d')。
+
+    使用定点整数运算（值 × 10^7）一次取整，结果与 float(f"{v:.7f}") 逐位一致。
+    """
+    if np is None:
+        rounded = array('d')
+        for value in values:
+            fixed = _fixed_point(value)
+            rounded.append(fixed / COORDINATE_SCALE if fixed is not None else float(f"{value:.{TRACK_POINT_DECIMAL_PLACES}f}"))
+        return rounded
+
+    values = np.asarray(values, dtype=np.float64)
+    fixed, exact = _fixed_point_array(values)
+    rounded = fixed / COORDINATE_SCALE
+    for index in np.flatnonzero(~exact).tolist():
+        rounded[index] = float(f"{values[index]:.{TRACK_POINT_DECIMAL_PLACES}f}")
+    return array('d', rounded.tobytes())
+
+
+def _fixed_point_digits(fixed, integer_digits):
+    """将非负定点整数数组展开为 ASCII 字符矩阵，每行为一个 "整数部分.小数部分" 文本。"""
+    width = integer_digits + 1 + TRACK_POINT_DECIMAL_PLACES
+    digits = np.empty((len(fixed), width), dtype=np.uint8)
+    digits[:, integer_digits] = ord(".")
+    remaining = fixed
+    for column in range(width - 1, -1, -1):
+        if column == integer_digits:
+            continue
+        remaining, digit = np.divmod(remaining, 10)
+        digits[:, column] = digit + ord("0")
+    return digits
+
+
+def format_locations(longitudes, latitudes):
+    """批量生成 "经度,纬度" 形式的 location 字符串列表。
+
+    与逐点 f"{lon:.7f},{lat:.7f}" 逐字节一致：安装 NumPy 时由定点整数一次性展开为字符矩阵，
+    再按固定宽度切分；坐标不满足快速路径条件时退回逐点格式化。
+    """
+    if np is not None and len(longitudes):
+        lon_fixed, lon_exact = _fixed_point_array(longitudes)
+        lat_fixed, lat_exact = _fixed_point_array(latitudes)
+        if lon_exact.all() and lat_exact.all():
+            lon_integer = lon_fixed // COORDINATE_SCALE
+            lat_integer = lat_fixed // COORDINATE_SCALE
+            lon_digits = len(str(int(lon_integer.max())))
+            lat_digits = len(str(int(lat_integer.max())))
+            # 整数部分位数一致时才能按固定宽度切分
+            if len(str(int(lon_integer.min()))) == lon_digits and len(str(int(lat_integer.min()))) == lat_digits:
+                comma = np.full((len(lon_fixed), 1), ord(","), dtype=np.uint8)
+                matrix = np.hstack((_fixed_point_digits(lon_fixed, lon_digits), comma, _fixed_point_digits(lat_fixed, lat_digits)))
+                width = matrix.shape[1]
+                text = matrix.tobytes().decode("ascii")
+                return [text[offset:offset + width] for offset in range(0, len(text), width)]
+
+    return [
+        f"{lon:.{TRACK_POINT_DECIMAL_PLACES}f},{lat:.{TRACK_POINT_DECIMAL_PLACES}f}"
+        for lon, lat in zip(longitudes, latitudes)
+    ]
+
+
 def get_current_epoch_ms():
     """返回当前 Unix epoch 毫秒整数。"""
     return int(_time.time() * 1000)
\ No newline at end of file
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from utils.auxiliary_util import SportsUploaderError
+
+# 阻塞调用检查取消请求的间隔（秒），即停止请求的最大响应延迟
+CANCEL_POLL_INTERVAL = 0.05
+
+
+class OperationCancelled(SportsUploaderError):
+    """任务被请求停止时抛出；继承 SportsUploaderError，沿用现有的错误处理路径。"""
+
+    def __init__(self, message="任务已停止。"):
+        super().__init__(message)
+
+
+class CancellationToken:
+    """
+    协作式取消标记，基于 threading.Event。
+    可直接作为 stop_check_cb 传入（调用时返回是否已取消），等待操作在取消后立即返回。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def __call__(self):
+        return self.cancelled
+
+    def wait(self, timeout=None):
+        """最多等待 timeout 秒；期间被取消则立即返回 True，超时返回 False。"""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise OperationCancelled()
+
+    def sleep(self, seconds):
+        """可中断的 sleep：被取消时抛出 OperationCancelled。"""
+        if self.wait(seconds):
+            raise OperationCancelled()
+
+
+class _CallbackCancellationToken(CancellationToken):
+    """将普通的 stop_check_cb 函数适配为取消标记，等待时按 CANCEL_POLL_INTERVAL 轮询。"""
+
+    def __init__(self, stop_check_cb):
+        super().__init__()
+        self._stop_check_cb = stop_check_cb
+
+    @property
+    def cancelled(self):
+        if not self._event.is_set() and self._stop_check_cb():
+            self._event.set()
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.cancelled:
+            interval = CANCEL_POLL_INTERVAL
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                interval = min(interval, remaining)
+            self._event.wait(interval)
+        return True
+
+
+def as_cancel_token(stop_check_cb):
+    """将 stop_check_cb（CancellationToken、普通函数或 None）统一转换为 CancellationToken。"""
+    if isinstance(stop_check_cb, CancellationToken):
+        return stop_check_cb
+    if stop_check_cb is None:
+        return CancellationToken()
+    return _CallbackCancellationToken(stop_check_cb)
+
+
+def run_cancellable(func, cancel_token=None, on_cancel=None):
+    """
+    在辅助线程中执行阻塞调用 func()，每 CANCEL_POLL_INTERVAL 秒检查一次取消请求。
+    被取消时先调用 on_cancel()（例如关闭 func 正在使用的 session，使阻塞的读写立即失败、辅助线程随之结束），
+    再抛出 OperationCancelled；辅助线程的结果被丢弃。
+    未传入 cancel_token 时直接在当前线程调用。
+    """
+    if cancel_token is None:
+        return func()
+    cancel_token.raise_if_cancelled()
+
+    done = threading.Event()
+    outcome = {}
+
+    def target():
+        try:
+            outcome["value"] = func()
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=target, name="cancellable-call", daemon=True).start()
+    while not done.wait(CANCEL_POLL_INTERVAL):
+        if cancel_token.cancelled:
+            if on_cancel is not None:
+                on_cancel()
+            raise OperationCancelled()
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
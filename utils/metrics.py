@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_NULL_CONTEXT = nullcontext()
+
+
+class NullMetrics:
+    """
+    默认的指标记录器：所有操作均为空操作，未开启指标时几乎没有额外开销。
+    timer 返回共享的空上下文，bind 返回自身。
+    """
+    enabled = False
+
+    def timer(self, name, **tags):
+        return _NULL_CONTEXT
+
+    def observe(self, name, duration_ms, **tags):
+        pass
+
+    def count(self, name, value=1, **tags):
+        pass
+
+    def bind(self, **tags):
+        return self
+
+
+NULL_METRICS = NullMetrics()
+
+
+class MetricsRecorder(NullMetrics):
+    """
+    将计时与计数以结构化记录（dict）交给 sink，sink 为任意可调用对象，例如 JsonlTraceSink。
+    每条记录包含 ts（Unix 时间戳）、type（timer/counter）、name 以及附加标签；
+    计时记录的耗时字段为 duration_ms，代码块抛出异常时附带 error（异常类型名）。
+    """
+    enabled = True
+
+    def __init__(self, sink, tags=None, totals=None, clock=time.perf_counter):
+        self._sink = sink
+        self._tags = dict(tags or {})
+        self._clock = clock
+        # 各计时项的汇总：name -> [次数, 总耗时, 最大耗时]，bind 出的记录器共享同一份
+        self._totals = totals if totals is not None else ({}, threading.Lock())
+
+    def bind(self, **tags):
+        """返回附带固定标签的记录器（例如 run=3），记录仍写入同一个 sink。"""
+        return MetricsRecorder(self._sink, {**self._tags, **tags}, self._totals, self._clock)
+
+    @contextmanager
+    def timer(self, name, **tags):
+        started = self._clock()
+        try:
+            yield
+        except BaseException as e:
+            self.observe(name, (self._clock() - started) * 1000, error=type(e).__name__, **tags)
+            raise
+        self.observe(name, (self._clock() - started) * 1000, **tags)
+
+    def observe(self, name, duration_ms, **tags):
+        """记录一段已测得的耗时（毫秒），用于无法用 timer 包裹的代码，例如流式编码。"""
+        self._add_total(name, duration_ms)
+        self._sink({"ts": time.time(), "type": "timer", "name": name, "duration_ms": duration_ms, **self._tags, **tags})
+
+    def count(self, name, value=1, **tags):
+        self._sink({"ts": time.time(), "type": "counter", "name": name, "value": value, **self._tags, **tags})
+
+    def _add_total(self, name, duration_ms):
+        totals, lock = self._totals
+        with lock:
+            entry = totals.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += duration_ms
+            entry[2] = max(entry[2], duration_ms)
+
+    def summary(self):
+        """返回各计时项的汇总 {name: (次数, 总耗时ms, 最大耗时ms)}，按总耗时从大到小排列。"""
+        totals, lock = self._totals
+        with lock:
+            items = [(name, tuple(entry)) for name, entry in totals.items()]
+        return dict(sorted(items, key=lambda item: item[1][1], reverse=True))
+
+    def format_summary(self):
+        lines = ["各阶段耗时统计（毫秒）:"]
+        for name, (count, total_ms, max_ms) in self.summary().items():
+            lines.append(f"  {name:<10} 次数 {count:4d}   总计 {total_ms:10.1f}   最大 {max_ms:9.1f}")
+        return "\n".join(lines)
+
+
+class JsonlTraceSink:
+    """将指标记录逐行以 JSON 追加写入文件，可在多个线程中同时使用。"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def metered_chunks(chunks, metrics):
+    """
+    包装流式请求体：统计生成各块所花的时间（serialize 计时）与发送的总字节数（bytes_sent 计数）。
+    请求体边编码边发送，因此 http 计时包含了这里的 serialize 时间。
+    """
+    clock = time.perf_counter
+    elapsed = 0.0
+    sent = 0
+    iterator = iter(chunks)
+    try:
+        while True:
+            started = clock()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                elapsed += clock() - started
+                break
+            elapsed += clock() - started
+            sent += len(chunk)
+            yield chunk
+    finally:
+        metrics.observe("serialize", elapsed * 1000)
+        metrics.count("bytes_sent", sent)
@@ -0,0 +1,108 @@
+import builtins
+import importlib
+import os
+import sys
+import tempfile
+import threading
+import time as _time
+from contextlib import contextmanager, nullcontext
+
+
+class LazyModule:
+    """模块的延迟加载代理：首次访问其属性时才真正 import，用于推迟启动阶段用不到的重量级依赖。"""
+    __slots__ = ("_name", "_module", "_profiler", "_lock")
+
+    def __init__(self, name, profiler=None):
+        self._name = name
+        self._module = None
+        self._profiler = profiler
+        self._lock = threading.Lock()
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    measure = self._profiler.measure(f"lazy import {self._name}") if self._profiler else nullcontext()
+                    with measure:
+                        self._module = importlib.import_module(self._name)
+                module = self._module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+class StartupProfiler:
+    """启动耗时统计：记录每个模块的导入耗时及各初始化阶段的耗时，未启用时不产生额外开销。"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.records = []
+        self._origin = _time.perf_counter()
+        self._depth = 0
+        self._original_import = None
+
+    def measure(self, label):
+        """统计 with 块的耗时；未启用时返回空上下文。"""
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(label)
+
+    @contextmanager
+    def _measure(self, label):
+        depth = self._depth
+        self._depth += 1
+        start = _time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth = depth
+            self.records.append((start - self._origin, _time.perf_counter() - start, depth, label))
+
+    def install_import_hook(self):
+        """包装 builtins.__import__，记录此后每个首次导入的模块耗时（含其依赖）。"""
+        if not self.enabled or self._original_import is not None:
+            return
+        original_import = self._original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules or threading.current_thread() is not threading.main_thread():
+                return original_import(name, globals, locals, fromlist, level)
+            with self._measure(f"import {name}"):
+                return original_import(name, globals, locals, fromlist, level)
+
+        builtins.__import__ = timed_import
+
+    def uninstall_import_hook(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, label):
+        """记录一个时间点（相对于 profiler 创建时刻）。"""
+        if self.enabled:
+            self.records.append((_time.perf_counter() - self._origin, 0.0, 0, label))
+
+    def format_report(self):
+        lines = ["启动耗时统计（毫秒）", f"{'开始':>9} {'耗时':>9}  阶段"]
+        for started, elapsed, depth, label in sorted(self.records, key=lambda r: (r[0], r[2])):
+            lines.append(f"{started * 1000:9.1f} {elapsed * 1000:9.1f}  {'  ' * depth}{label}")
+        return "\n".join(lines)
+
+    def report(self):
+        """输出统计结果；无控制台（如打包的窗口程序）时写入临时目录下的文件。"""
+        if not self.enabled:
+            return None
+        text = self.format_report()
+        if sys.stdout is not None:
+            print(text)
+            return None
+        report_path = os.path.join(tempfile.gettempdir(), "SJTURunning-startup-profile.txt")
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        return report_path